@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from engine import compact_table, create_engine, filter_data, read_table, write_table
+from search_index import IncrementalSearch, SearchIndex
+from virtual_grid import BUFFER_ROWS, WIDTH_SAMPLE_SIZE, column_widths, format_rows
+
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+HONORIFICS = ["Dr.", "Mr.", "Mrs.", "Ms.", "Prof."]
+DEPARTMENTS = ["Sales", "HR", "Finance", "IT Support", "Operations", "Legal", "Marketing", "Research"]
+LOCATIONS = ["Almaty", "Astana", "Berlin", "London", "New York", "Singapore", "Toronto"]
+SEARCH_TERMS = ["ann", "sales", "dr. m", "zzz", "40"]
+VISIBLE_ROWS = 30
+
+
+def synthetic_names(rows, unique_names, seed=0):
+    rng = random.Random(seed)
+    engine = create_engine(cache_path=None, table_path=None)
+    known = sorted(engine.detector.names)
+    pool = [rng.choice(known) for _ in range(unique_names)]
+    return pd.Series([f"{rng.choice(pool)} {rng.choice(known)}" for _ in range(rows)])
+
+
+def synthetic_roster(rows, extra_columns=2, repetition=0.02, honorific_rate=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    unique_names = max(int(rows * repetition), 1)
+    names = synthetic_names(rows, unique_names, seed).to_numpy(dtype=object)
+    titled = rng.random(rows) < honorific_rate
+    names[titled] = [f"{HONORIFICS[i]} {name}" for i, name in zip(rng.integers(0, len(HONORIFICS), titled.sum()), names[titled])]
+
+    roster = pd.DataFrame({
+        "Employee ID": np.arange(1, rows + 1),
+        "Full Name": names,
+        "Department": rng.choice(DEPARTMENTS, rows),
+        "Location": rng.choice(LOCATIONS, rows),
+        "Salary": rng.integers(30000, 200000, rows),
+    })
+    for i in range(extra_columns):
+        roster[f"Attribute {i + 1}"] = rng.choice([f"value {j}" for j in range(50)], rows)
+    return roster
+
+
+def measure(func, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, timings, peak
+
+
+def summarize(stage, rows, timings, peak):
+    timings = np.array(timings)
+    return {
+        "stage": stage,
+        "rows": rows,
+        "p50_ms": float(np.percentile(timings, 50) * 1000),
+        "p95_ms": float(np.percentile(timings, 95) * 1000),
+        "rows_per_s": float(rows / np.median(timings)) if np.median(timings) > 0 else float("inf"),
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def bench_pipeline(rows, extra_columns, repetition, honorific_rate, formats, repeats):
+    roster = synthetic_roster(rows, extra_columns, repetition, honorific_rate)
+    engine = create_engine(cache_path=None)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for file_format in formats:
+            path = os.path.join(directory, f"roster.{file_format}")
+            write_table(roster, path)
+
+            data, timings, peak = measure(lambda: compact_table(read_table(path)), repeats)
+            results.append(summarize(f"import_{file_format}", rows, timings, peak))
+
+        processed, timings, peak = measure(lambda: engine.classify(data, "Full Name"), repeats)
+        results.append(summarize("detect", rows, timings, peak))
+
+        index, timings, peak = measure(lambda: SearchIndex(processed), repeats)
+        results.append(summarize("search_index_build", rows, timings, peak))
+
+        def search_scan():
+            for term in SEARCH_TERMS:
+                filter_data(processed, "All", term)
+
+        def search_indexed():
+            for term in SEARCH_TERMS:
+                filter_data(processed, "All", term, index=index)
+
+        def search_incremental():
+            searcher = IncrementalSearch(processed, index)
+            for i in range(1, len("sales") + 1):
+                searcher.search("sales"[:i])
+
+        for stage, func in [("search_scan", search_scan), ("search_indexed", search_indexed),
+                            ("search_as_you_type", search_incremental)]:
+            _, timings, peak = measure(func, repeats)
+            results.append(summarize(stage, rows, timings, peak))
+
+        def display():
+            column_widths(processed.iloc[:WIDTH_SAMPLE_SIZE])
+            middle = len(processed) // 2
+            format_rows(processed.iloc[middle:middle + VISIBLE_ROWS + 2 * BUFFER_ROWS])
+
+        _, timings, peak = measure(display, repeats)
+        results.append(summarize("display_window", rows, timings, peak))
+
+        for file_format in formats:
+            path = os.path.join(directory, f"export.{file_format}")
+            _, timings, peak = measure(lambda: write_table(processed, path), repeats)
+            results.append(summarize(f"export_{file_format}", rows, timings, peak))
+    engine.close()
+    return results
+
+
+def print_results(results, baseline=None):
+    baseline = {entry["stage"]: entry for entry in baseline or []}
+    print(f"{'stage':<22}{'rows':>10}{'p50 ms':>12}{'p95 ms':>12}{'rows/s':>14}{'peak MB':>10}{'vs base':>10}")
+    for entry in results:
+        reference = baseline.get(entry["stage"])
+        ratio = f"x{entry['p50_ms'] / reference['p50_ms']:.2f}" if reference and reference["p50_ms"] else ""
+        print(f"{entry['stage']:<22}{entry['rows']:>10}{entry['p50_ms']:>12.1f}{entry['p95_ms']:>12.1f}"
+              f"{entry['rows_per_s']:>14,.0f}{entry['peak_mb']:>10.1f}{ratio:>10}")
+
+
+def regressions(results, baseline, tolerance):
+    reference = {entry["stage"]: entry for entry in baseline}
+    return [entry["stage"] for entry in results
+            if entry["stage"] in reference and entry["p50_ms"] > reference[entry["stage"]]["p50_ms"] * (1 + tolerance)]
+
+
+def bench_parallel(rows, unique_names, worker_counts):
+    names = synthetic_names(rows, unique_names)
+    baseline = None
+    for workers in worker_counts:
+        engine = create_engine(cache_path=None, workers=workers)
+        if workers > 1:
+            engine._parallel_pool().submit(int).result()
+        started = time.perf_counter()
+        result = engine.classify_names(names)
+        elapsed = time.perf_counter() - started
+        engine.close()
+
+        if baseline is None:
+            baseline = (elapsed, result)
+        elif not result.equals(baseline[1]):
+            raise AssertionError(f"Parallel result with {workers} workers differs from the baseline")
+        print(f"workers={workers:<3} {elapsed:8.3f}s  {rows / elapsed:12,.0f} rows/s  speedup x{baseline[0] / elapsed:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gender classification.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = commands.add_parser("pipeline", help="Time every pipeline stage on a synthetic roster")
+    pipeline.add_argument("--rows", type=int, default=100000)
+    pipeline.add_argument("--extra-columns", type=int, default=2)
+    pipeline.add_argument("--repetition", type=float, default=0.02, help="Unique names as a fraction of rows")
+    pipeline.add_argument("--honorific-rate", type=float, default=0.1, help="Fraction of names with a title like 'Dr.'")
+    pipeline.add_argument("--formats", nargs="+", choices=["csv", "xlsx"], default=["csv", "xlsx"])
+    pipeline.add_argument("--repeats", type=int, default=3)
+    pipeline.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline file to compare against (default: %(default)s)")
+    pipeline.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    pipeline.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown before failing (default: %(default)s)")
+
+    parallel = commands.add_parser("parallel", help="Measure multi-process classification scaling")
+    parallel.add_argument("--rows", type=int, default=1000000)
+    parallel.add_argument("--unique-names", type=int, default=40000)
+    parallel.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+
+    args = parser.parse_args(argv)
+    if args.command == "parallel":
+        bench_parallel(args.rows, args.unique_names, args.workers)
+        return 0
+
+    results = bench_pipeline(args.rows, args.extra_columns, args.repetition, args.honorific_rate, args.formats, args.repeats)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif baseline:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(slower)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
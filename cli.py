@@ -0,0 +1,225 @@
+import argparse
+import logging
+import os
+import sys
+from engine import (EXPORT_FORMATS, GENDERS, IO_WORKERS, MATCH_COLUMN, READ_CHUNK_SIZE, batch_output_paths, batch_stats,
+                    create_engine, delta_report, delta_summary, expand_inputs, export_format_for, export_split,
+                    filter_data, merge_batch, read_batch, shared_key, split_outputs, write_table, write_tables)
+from fuzzy_index import DEFAULT_MAX_DISTANCE
+from group_stats import GroupStats
+from lookup_table import DEFAULT_TABLE_PATH
+from metrics import METRICS
+from name_cache import DEFAULT_CACHE_PATH
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Classify employee names by gender without the GUI.")
+    parser.add_argument("input", nargs="+", help="Input .csv or .xlsx file; several files, directories or quoted globs are classified as a batch")
+    parser.add_argument("output", help="Output file path; a '{gender}' placeholder writes one file per gender plus 'all' in a single pass. "
+                                       "In batch mode a directory receives one output per input, a file receives all rows merged")
+    parser.add_argument("--name-column", help="Column holding the names (auto-detected by default)")
+    parser.add_argument("--gender", choices=["All"] + GENDERS, default="All", help="Only export rows of this gender")
+    parser.add_argument("--search", default="", help="Only export rows containing this text")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Output format (inferred from the output extension by default)")
+    parser.add_argument("--country", help="Country hint passed to the name detector (e.g. great_britain, usa)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Name cache file (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache", action="store_const", const=None, help="Disable the name cache")
+    parser.add_argument("--table", default=DEFAULT_TABLE_PATH, help="Compiled name table, used instead of the detector when present (default: %(default)s)")
+    parser.add_argument("--no-table", dest="table", action="store_const", const=None, help="Ignore the compiled name table")
+    parser.add_argument("--parallel-writes", action="store_true", help="Write the per-gender files of a '{gender}' output concurrently")
+    parser.add_argument("--fast-import", action="store_true", help="Detect the name column from the header and read with the fastest available reader (pyarrow for CSV, calamine for Excel)")
+    parser.add_argument("--columns", nargs="+", help="Only load these columns (plus the name column); implies --fast-import")
+    parser.add_argument("--workers", type=int, default=1, help="Classify large files across this many processes (default: %(default)s)")
+    parser.add_argument("--fuzzy", type=int, nargs="?", const=DEFAULT_MAX_DISTANCE, default=0, metavar="DISTANCE",
+                        help=f"Match unknown names to the nearest dictionary name within DISTANCE edits and record it in a '{MATCH_COLUMN}' column (default when given: {DEFAULT_MAX_DISTANCE})")
+    parser.add_argument("--stream", action="store_true", help="Classify a CSV in chunks without loading it into memory (CSV output only)")
+    parser.add_argument("--chunk-size", type=int, default=READ_CHUNK_SIZE, help="Rows per chunk in --stream mode (default: %(default)s)")
+    parser.add_argument("--previous", help="Previous processed output; only names missing from it are classified again")
+    parser.add_argument("--key", help="Column identifying employees across runs for the change report (auto-detected by default)")
+    parser.add_argument("--delta", help="Write the rows added, removed, renamed or reclassified since --previous to this file")
+    parser.add_argument("--io-workers", type=int, default=IO_WORKERS, help="Files read and written concurrently in batch mode (default: %(default)s)")
+    parser.add_argument("--summary", help="Write the per-file batch statistics to this file")
+    parser.add_argument("--crosstab", help="Write Male/Female/Unknown counts per group of the exported rows to this file")
+    parser.add_argument("--group-by", nargs="+", help="Columns to break --crosstab down by (default: every column with few distinct values)")
+    parser.add_argument("--metrics", help="Write per-stage timings and cache counters to this JSON file")
+    parser.add_argument("--profile", help="Save a cProfile dump of the run into this directory")
+    parser.add_argument("--verbose", action="store_true", help="Print per-stage timings after the run")
+    return parser
+
+
+def stream(args, engine):
+    if not args.input.lower().endswith('.csv') or (args.format or export_format_for(args.output)) != "csv":
+        print("--stream requires CSV input and output", file=sys.stderr)
+        return 1
+    if args.crosstab:
+        print("--crosstab is not supported with --stream", file=sys.stderr)
+        return 1
+
+    if "{gender}" in args.output:
+        outputs = split_outputs(args.output)
+    else:
+        outputs = {args.gender: args.output}
+
+    try:
+        name_column, counts = engine.classify_csv_stream(
+            args.input, outputs, args.name_column, args.search, args.chunk_size)
+    except Exception as e:
+        print(f"Failed to process {args.input}: {e}", file=sys.stderr)
+        return 1
+
+    for gender, path in outputs.items():
+        print(f"Saved {counts[gender]} {gender} records (name column: {name_column}) to {os.path.basename(path)}")
+    return 0
+
+
+def incremental(args, engine):
+    processed, name_column, previous, previous_name_column, reused = engine.classify_file_incremental(
+        args.input, args.previous, args.name_column)
+    print(f"Reused {reused} of {len(processed)} genders from {os.path.basename(args.previous)}; "
+          f"classified {len(processed) - reused} new or changed names")
+
+    report = delta_report(previous, processed, name_column, previous_name_column,
+                          args.key or shared_key(previous, processed))
+    key = report.attrs["key"]
+    print(", ".join(f"{count} {change.replace('_', ' ')}" for change, count in delta_summary(report).items())
+          + (f" (matched on {key})" if key else " (matched on name)"))
+    if args.delta:
+        write_table(report, args.delta)
+        print(f"Saved {len(report)} changes to {os.path.basename(args.delta)}")
+    return processed, name_column
+
+
+def crosstab(args, data):
+    try:
+        report = GroupStats(data).report(args.group_by)
+        write_table(report, args.crosstab)
+    except Exception as e:
+        print(f"Failed to export the gender breakdown: {e}", file=sys.stderr)
+        return 1
+    groups = ", ".join(report["Group By"].unique()[1:]) or "no column"
+    print(f"Saved gender breakdown by {groups} to {os.path.basename(args.crosstab)}")
+    return 0
+
+
+def classify(args, engine):
+    try:
+        if args.previous:
+            processed, name_column = incremental(args, engine)
+        else:
+            processed, name_column = engine.classify_file(args.input, args.name_column, args.fast_import, args.columns)
+    except Exception as e:
+        print(f"Failed to process {args.input}: {e}", file=sys.stderr)
+        return 1
+
+    if "{gender}" in args.output:
+        outputs = split_outputs(args.output)
+        try:
+            data_to_export = filter_data(processed, search_term=args.search)
+            counts = export_split(data_to_export, outputs, args.format, args.parallel_writes)
+        except Exception as e:
+            print(f"Failed to export data: {e}", file=sys.stderr)
+            return 1
+        for gender, path in outputs.items():
+            print(f"Saved {counts[gender]} {gender} records (name column: {name_column}) to {os.path.basename(path)}")
+        return crosstab(args, data_to_export) if args.crosstab else 0
+
+    data_to_export = filter_data(processed, args.gender, args.search)
+    try:
+        write_table(data_to_export, args.output, args.format)
+    except Exception as e:
+        print(f"Failed to export data: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Saved {len(data_to_export)} of {len(processed)} records (name column: {name_column}) to {os.path.basename(args.output)}")
+    return crosstab(args, data_to_export) if args.crosstab else 0
+
+
+def print_metrics():
+    snapshot = METRICS.snapshot()
+    for name, stage in snapshot["stages"].items():
+        print(f"{name:<14}{stage['seconds'] * 1000:>10.1f} ms{stage['calls']:>6} calls{stage['items']:>12} items", file=sys.stderr)
+    for name, value in snapshot["counters"].items():
+        print(f"{name:<14}{value:>13}", file=sys.stderr)
+
+
+def is_batch(inputs):
+    return len(inputs) > 1 or any(os.path.isdir(path) or any(char in path for char in "*?[") for path in inputs)
+
+
+def batch(args, engine):
+    inputs = expand_inputs(args.input)
+    if not inputs:
+        print(f"No .csv or .xlsx files found in {', '.join(args.input)}", file=sys.stderr)
+        return 1
+
+    entries = engine.classify_batch(read_batch(inputs, args.name_column, args.io_workers))
+    stats = batch_stats(entries)
+    print(stats.to_string(index=False))
+    loaded = [entry for entry in entries if entry["error"] is None]
+    if not loaded:
+        print("No input file could be read", file=sys.stderr)
+        return 1
+
+    try:
+        if os.path.isdir(args.output) or not os.path.splitext(args.output)[1]:
+            paths = batch_output_paths(loaded, args.output, args.format)
+            for directory in {os.path.dirname(path) for path in paths}:
+                os.makedirs(directory, exist_ok=True)
+            jobs = [(filter_data(entry["data"], args.gender, args.search), path) for entry, path in zip(loaded, paths)]
+            write_tables(jobs, args.format, args.io_workers)
+            print(f"Saved {sum(len(data) for data, _ in jobs)} records from {len(jobs)} files to {args.output}")
+        elif "{gender}" in args.output:
+            outputs = split_outputs(args.output)
+            counts = export_split(filter_data(merge_batch(loaded), search_term=args.search), outputs, args.format,
+                                  args.parallel_writes)
+            for gender, path in outputs.items():
+                print(f"Saved {counts[gender]} {gender} records from {len(loaded)} files to {os.path.basename(path)}")
+        else:
+            merged = filter_data(merge_batch(loaded), args.gender, args.search)
+            write_table(merged, args.output, args.format)
+            print(f"Saved {len(merged)} records from {len(loaded)} files to {os.path.basename(args.output)}")
+        if args.summary:
+            write_table(stats, args.summary)
+    except Exception as e:
+        print(f"Failed to export data: {e}", file=sys.stderr)
+        return 1
+    if args.crosstab and crosstab(args, filter_data(merge_batch(loaded), args.gender, args.search)):
+        return 1
+    return 0 if len(loaded) == len(entries) else 1
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if is_batch(args.input):
+        unsupported = [option for option, value in [("--previous", args.previous), ("--delta", args.delta),
+                                                    ("--stream", args.stream), ("--fast-import", args.fast_import),
+                                                    ("--columns", args.columns)] if value]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} cannot be used when classifying several files")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    METRICS.profile_dir = args.profile
+    try:
+        engine = create_engine(args.cache, args.country, args.table, args.workers, args.fuzzy)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    if is_batch(args.input):
+        command = batch
+    else:
+        args.input = args.input[0]
+        command = stream if args.stream else classify
+
+    try:
+        return METRICS.run_profiled("cli", command, args, engine)
+    finally:
+        engine.close()
+        if args.verbose:
+            print_metrics()
+        if args.metrics:
+            METRICS.write_json(args.metrics, input=args.input, output=args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,869 @@
+import glob
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sqlite3
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from importlib.metadata import PackageNotFoundError, version
+import numpy as np
+import pandas as pd
+from gender_guesser.detector import Detector
+from fuzzy_index import FuzzyIndex
+from lookup_table import DEFAULT_TABLE_PATH, NameTable, save_name_table
+from metrics import METRICS
+from name_cache import DEFAULT_CACHE_PATH, NameCache
+
+NAME_COLUMNS = ["first name", "name"]
+KEY_COLUMNS = ["employee id", "employee_id", "employee number", "emp id", "staff id"]
+DELTA_CHANGES = ["added", "removed", "renamed", "gender_changed"]
+GENDERS = ["Male", "Female", "Unknown"]
+MATCH_COLUMN = "Matched Name"
+GENDER_MAP = {
+    "male": "Male",
+    "mostly_male": "Male",
+    "female": "Female",
+    "mostly_female": "Female",
+    "andy": "Unknown",
+    "unknown": "Unknown"
+}
+EXPORT_FORMATS = ["xlsx", "csv", "parquet", "arrow"]
+EXPORT_EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet",
+                     ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+HONORIFICS = ["mr", "mrs", "ms", "miss", "mx", "dr", "prof", "professor", "sir", "dame", "lady", "lord", "rev",
+              "herr", "frau", "fru", "mme", "mlle", "sra", "srta"]
+NAME_SUFFIXES = ["jr", "sr", "ii", "iii", "iv", "phd", "md", "esq", "mba", "cpa"]
+NICKNAME_PATTERN = r'\([^)]*\)|"[^"]*"'
+SUFFIX_PATTERN = r'(?i)(?:,?\s+(?:' + "|".join(NAME_SUFFIXES) + r')\.?)+\s*$'
+SURNAME_FIRST_PATTERN = r'^[^,]*,\s*'
+LEADING_TOKENS_PATTERN = r'(?i)^\s*(?:(?:' + "|".join(HONORIFICS) + r')\s+|\S*\.\s*|\w\s+)+'
+FIRST_TOKEN_PATTERN = r'(?s)^\s*(\S*).*$'
+SECOND_TOKEN_PATTERN = r'(?s)^\s*\S*\s*(\S*).*$'
+TRAILING_PUNCTUATION_PATTERN = r'[.,;:!?)"\]]+$'
+TABLE_COUNTRIES = [None] + Detector.COUNTRIES
+READ_CHUNK_SIZE = 100000
+WRITE_CHUNK_SIZE = 100000
+LOOKUP_CHUNK_SIZE = 5000
+PARALLEL_MIN_ROWS = 50000
+PARALLEL_SHARD_SIZE = 50000
+COMPACT_MAX_UNIQUE_RATIO = 0.5
+MIXED_TYPES = ("mixed", "mixed-integer")
+BATCH_EXTENSIONS = (".csv", ".xlsx", ".xls")
+IO_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+_worker_engine = None
+logger = logging.getLogger(__name__)
+
+
+def read_table(file_path, progress=None, usecols=None, dtype=None):
+    with METRICS.stage("read") as stage:
+        data = _read_table(file_path, progress, usecols, dtype)
+        stage["items"] = len(data)
+    return data
+
+
+def _read_table(file_path, progress=None, usecols=None, dtype=None):
+    if not file_path.lower().endswith('.csv'):
+        if progress:
+            progress(0, 0)
+        return pd.read_excel(file_path, usecols=usecols, dtype=dtype, engine=EXCEL_ENGINE)
+    if progress is None:
+        return pd.read_csv(file_path, usecols=usecols, dtype=dtype)
+
+    total = os.path.getsize(file_path)
+    chunks = []
+    with open(file_path, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=READ_CHUNK_SIZE, usecols=usecols, dtype=dtype):
+            chunks.append(chunk)
+            progress(f.tell(), total)
+    if not chunks:
+        return pd.read_csv(file_path, usecols=usecols, dtype=dtype)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_header(file_path):
+    if file_path.lower().endswith('.csv'):
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    if file_path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            header = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        if header and None not in header and len(set(header)) == len(header):
+            return list(header)
+    return list(pd.read_excel(file_path, nrows=0, engine=EXCEL_ENGINE).columns)
+
+
+def read_table_fast(file_path, name_column=None, columns=None, progress=None):
+    with METRICS.stage("read_header"):
+        header = read_header(file_path)
+    with METRICS.stage("name_column"):
+        name_column = name_column or find_name_column(header)
+    if name_column not in header:
+        raise ValueError(f"No suitable name column found in {os.path.basename(file_path)}")
+
+    usecols = [col for col in header if columns is None or col in columns or col == name_column]
+    if progress:
+        progress(0, 0)
+    with METRICS.stage("read") as stage:
+        if file_path.lower().endswith('.csv'):
+            data = pd.read_csv(file_path, usecols=usecols, dtype={name_column: str}, engine=CSV_ENGINE)
+        else:
+            data = pd.read_excel(file_path, usecols=usecols, dtype={name_column: str}, engine=EXCEL_ENGINE)
+        stage["items"] = len(data)
+    return data[usecols], name_column
+
+
+def write_table(df, file_path, file_format=None, progress=None):
+    with METRICS.stage("write", len(df)):
+        _write_table(df, file_path, file_format, progress)
+
+
+def _write_table(df, file_path, file_format=None, progress=None):
+    file_format = file_format or export_format_for(file_path)
+    if file_format == "csv":
+        with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+            for start in range(0, max(len(df), 1), WRITE_CHUNK_SIZE):
+                df.iloc[start:start + WRITE_CHUNK_SIZE].to_csv(f, index=False, header=start == 0)
+                if progress:
+                    progress(min(start + WRITE_CHUNK_SIZE, len(df)), len(df))
+    elif file_format == "xlsx":
+        write_xlsx(df, file_path, progress)
+    elif file_format == "parquet":
+        if progress:
+            progress(0, 0)
+        arrow_compatible(df).to_parquet(file_path, index=False)
+    elif file_format == "arrow":
+        if progress:
+            progress(0, 0)
+        arrow_compatible(df).reset_index(drop=True).to_feather(file_path)
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+
+def _as_text(values):
+    return values.astype(object).where(values.isna(), values.astype(str))
+
+
+def arrow_compatible(df):
+    df = df.copy(deep=False)
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            sample = values.cat.categories
+        elif values.dtype == object:
+            sample = values
+        else:
+            continue
+        if pd.api.types.infer_dtype(sample, skipna=True) in MIXED_TYPES:
+            df[col] = _as_text(values)
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def write_xlsx(df, file_path, progress=None):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append([str(col) for col in df.columns])
+    for start in range(0, len(df), WRITE_CHUNK_SIZE):
+        chunk = df.iloc[start:start + WRITE_CHUNK_SIZE].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+        if progress:
+            progress(min(start + WRITE_CHUNK_SIZE, len(df)), len(df))
+    workbook.save(file_path)
+
+
+def export_format_for(file_path):
+    return EXPORT_EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), "xlsx")
+
+
+def detect_name_column(df, name_columns=NAME_COLUMNS):
+    if df.empty:
+        return None
+    with METRICS.stage("name_column"):
+        return find_name_column(df.columns, name_columns)
+
+
+def find_name_column(columns, name_columns=NAME_COLUMNS):
+    for col in columns:
+        col_lower = str(col).strip().lower()
+        for name_var in name_columns:
+            if name_var == col_lower:
+                return col
+    for col in columns:
+        col_lower = str(col).strip().lower()
+        for name_var in name_columns:
+            if name_var in col_lower:
+                return col
+    return None
+
+
+def find_key_column(columns, key_columns=KEY_COLUMNS):
+    lowered = {}
+    for col in columns:
+        lowered.setdefault(str(col).strip().lower(), col)
+    for key in key_columns:
+        if key in lowered:
+            return lowered[key]
+    return None
+
+
+def compact_table(df, max_unique_ratio=COMPACT_MAX_UNIQUE_RATIO):
+    compact = df.copy(deep=False)
+    for col in compact.columns:
+        column = compact[col]
+        if pd.api.types.is_integer_dtype(column.dtype):
+            compact[col] = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_object_dtype(column.dtype) or pd.api.types.is_string_dtype(column.dtype):
+            if len(column) and column.nunique(dropna=True) <= len(column) * max_unique_ratio:
+                compact[col] = column.astype("category")
+    return compact
+
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def output_path_for(path_pattern, gender):
+    return path_pattern.replace("{gender}", gender.lower())
+
+
+def split_path_pattern(file_path):
+    root, ext = os.path.splitext(file_path)
+    return f"{root}_{{gender}}{ext}"
+
+
+def split_outputs(path_pattern, include_all=True):
+    genders = (["All"] if include_all else []) + GENDERS
+    return {gender: output_path_for(path_pattern, gender) for gender in genders}
+
+
+def split_by_gender(df):
+    codes = pd.Categorical(df["Gender"], categories=GENDERS).codes
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(GENDERS) + 1))
+    parts = {gender: df.iloc[order[bounds[i]:bounds[i + 1]]] for i, gender in enumerate(GENDERS)}
+    parts["All"] = df
+    return parts
+
+
+def export_split(df, outputs, file_format=None, parallel=False, progress=None):
+    parts = split_by_gender(df)
+    write_tables([(parts[gender], path) for gender, path in outputs.items()], file_format,
+                 len(outputs) if parallel else 1, progress)
+    return {gender: len(parts[gender]) for gender in outputs}
+
+
+def write_tables(jobs, file_format=None, max_workers=1, progress=None):
+    if progress:
+        progress(0, len(jobs))
+
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(write_table, part, path, file_format) for part, path in jobs]
+            for done, future in enumerate(futures, 1):
+                future.result()
+                if progress:
+                    progress(done, len(jobs))
+    else:
+        for done, (part, path) in enumerate(jobs, 1):
+            write_table(part, path, file_format)
+            if progress:
+                progress(done, len(jobs))
+
+
+def expand_inputs(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, subfolders, names in os.walk(path):
+                subfolders.sort()
+                files.extend(sorted(os.path.join(folder, name) for name in names
+                                    if name.lower().endswith(BATCH_EXTENSIONS) and not name.startswith("~$")))
+        elif any(char in path for char in "*?["):
+            files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def _load_batch_file(path, name_column=None):
+    data = read_table(path)
+    column = name_column if name_column in data.columns else detect_name_column(data)
+    if not column:
+        raise ValueError(f"No suitable name column found in {os.path.basename(path)}")
+    return data, column
+
+
+def batch_root(paths):
+    if not paths:
+        return None
+    try:
+        return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    except ValueError:
+        return None
+
+
+def batch_source(path, root):
+    if root is None:
+        return os.path.basename(path)
+    return os.path.relpath(os.path.abspath(path), root)
+
+
+def read_batch(paths, name_column=None, max_workers=IO_WORKERS, progress=None):
+    root = batch_root(paths)
+    batch = {path: {"path": path, "source": batch_source(path, root), "data": None, "name_column": None, "error": None}
+             for path in paths}
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(paths)), 1)) as pool:
+        futures = {pool.submit(_load_batch_file, path, name_column): path for path in paths}
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = batch[futures[future]]
+            try:
+                entry["data"], entry["name_column"] = future.result()
+            except Exception as e:
+                entry["error"] = str(e)
+            if progress:
+                progress(done, len(paths))
+    return list(batch.values())
+
+
+def batch_output_path(source, output_dir, file_format=None, suffix="_gender"):
+    stem, extension = os.path.splitext(source)
+    extension = f".{file_format}" if file_format else extension
+    if extension.lower() == ".xls":
+        extension = ".xlsx"
+    return os.path.join(output_dir, f"{stem}{suffix}{extension}")
+
+
+def batch_output_paths(batch, output_dir, file_format=None):
+    paths = [batch_output_path(entry["source"], output_dir, file_format) for entry in batch]
+    seen = {}
+    for entry, path in zip(batch, paths):
+        if path in seen:
+            raise ValueError(f"{seen[path]} and {entry['source']} would both be written to {path}")
+        seen[path] = entry["source"]
+    return paths
+
+
+def merge_batch(batch):
+    frames = [entry["data"].assign(**{"Source File": entry["source"]})
+              for entry in batch if entry["error"] is None]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True, sort=False)
+    trailing = [col for col in ("Gender", MATCH_COLUMN) if col in merged.columns]
+    columns = [col for col in merged.columns if col not in ["Source File"] + trailing]
+    return merged[["Source File"] + columns + trailing]
+
+
+def batch_stats(batch):
+    rows = []
+    for entry in batch:
+        stats = dict({"File": entry["source"], "Name Column": entry["name_column"] or "", "Rows": 0},
+                     **dict.fromkeys(GENDERS, 0))
+        if entry["error"] is None:
+            stats["Rows"] = len(entry["data"])
+            if "Gender" in entry["data"].columns:
+                counts = np.bincount(gender_codes(entry["data"]["Gender"]) + 1, minlength=len(GENDERS) + 1)[1:]
+                stats.update(zip(GENDERS, counts.tolist()))
+        stats["Error"] = entry["error"] or ""
+        rows.append(stats)
+    return pd.DataFrame(rows, columns=["File", "Name Column", "Rows"] + GENDERS + ["Error"])
+
+
+def normalize_names(names):
+    names = names.astype(str).str.normalize("NFC")
+    names = names.str.replace(NICKNAME_PATTERN, " ", regex=True)
+    names = names.str.replace(SUFFIX_PATTERN, "", regex=True)
+    names = names.str.replace(SURNAME_FIRST_PATTERN, "", regex=True)
+    names = names.str.replace(LEADING_TOKENS_PATTERN, "", regex=True)
+
+    first = names.str.replace(FIRST_TOKEN_PATTERN, r"\1", regex=True)
+    upper = first.str.isupper() & (first.str.len() > 1)
+    if upper.any():
+        second = names[upper].str.replace(SECOND_TOKEN_PATTERN, r"\1", regex=True)
+        surname_first = second.str.istitle() & ~second.str.isupper()
+        first[surname_first[surname_first].index] = second[surname_first]
+
+    first = first.str.replace(TRAILING_PUNCTUATION_PATTERN, "", regex=True)
+    folded = (first.str.isupper() | first.str.islower()).fillna(False)
+    first = first.where(~folded, first.str.title())
+    return first.where(first.str.len() > 0)
+
+
+def strip_marks(name):
+    decomposed = unicodedata.normalize("NFD", name)
+    return unicodedata.normalize("NFC", "".join(c for c in decomposed if unicodedata.category(c) != "Mn"))
+
+
+def extract_first_names(names):
+    codes, unique_names = pd.factorize(names)
+    first_names = np.full(len(unique_names) + 1, np.nan, dtype=object)
+    if len(unique_names):
+        first_names[:-1] = normalize_names(pd.Series(unique_names, dtype="str")).to_numpy(dtype=object, na_value=np.nan)
+    return pd.Series(first_names[codes], index=names.index, dtype=object)
+
+
+def detector_fingerprint(case_sensitive=True):
+    try:
+        detector_version = version("gender-guesser")
+    except PackageNotFoundError:
+        detector_version = "unknown"
+    payload = json.dumps([detector_version, case_sensitive, GENDER_MAP], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def search_mask(df, search_term, progress=None):
+    mask = pd.Series(False, index=df.index)
+    for i, col in enumerate(df.columns):
+        mask = mask | df[col].astype(str).str.lower().str.contains(search_term, na=False, regex=False)
+        if progress:
+            progress(i + 1, len(df.columns))
+    return mask
+
+
+def gender_masks(df):
+    codes = pd.Categorical(df["Gender"], categories=GENDERS).codes
+    return {gender: codes == i for i, gender in enumerate(GENDERS)}
+
+
+def filter_data(df, gender="All", search_term="", progress=None, index=None):
+    search_term = search_term.strip().lower()
+    if not search_term:
+        return df[df["Gender"] == gender] if gender != "All" else df
+
+    with METRICS.stage("search", len(df)):
+        return _filter_data(df, gender, search_term, progress, index)
+
+
+def _filter_data(df, gender, search_term, progress, index):
+    if index is not None:
+        df = df[index.search(search_term)]
+        search_term = ""
+
+    if gender != "All":
+        df = df[df["Gender"] == gender]
+
+    if search_term:
+        df = df[search_mask(df, search_term, progress)]
+    return df
+
+
+def shared_codes(left, right):
+    if left.dtype == right.dtype and not isinstance(left.dtype, pd.CategoricalDtype):
+        combined = pd.concat([left, right], ignore_index=True)
+    else:
+        combined = np.concatenate([left.to_numpy(dtype=object), right.to_numpy(dtype=object)])
+    codes, _ = pd.factorize(combined)
+    return codes[:len(left)], codes[len(left):]
+
+
+def gender_codes(genders):
+    return pd.Categorical(genders, categories=GENDERS).codes
+
+
+def shared_key(previous, processed):
+    return find_key_column([col for col in processed.columns if col in previous.columns])
+
+
+def usable_key(previous, processed, key):
+    if key is None or key not in previous.columns or key not in processed.columns:
+        return None
+    for keys in (previous[key], processed[key]):
+        if keys.isna().any() or not keys.is_unique:
+            logger.warning("Key column '%s' has blank or duplicate values; matching rows by name instead", key)
+            return None
+    return key
+
+
+def delta_report(previous, processed, name_column, previous_name_column=None, key=None):
+    previous_name_column = previous_name_column or name_column
+    key = usable_key(previous, processed, key)
+    with METRICS.stage("delta", len(previous) + len(processed)):
+        old_codes, new_codes = shared_codes(previous[previous_name_column], processed[name_column])
+        old = pd.DataFrame({"_old_row": np.arange(len(previous))})
+        new = pd.DataFrame({"_new_row": np.arange(len(processed))})
+        if key is not None:
+            old[key] = previous[key].to_numpy()
+            new[key] = processed[key].to_numpy()
+            on = [key]
+        else:
+            old["_code"], new["_code"] = old_codes, new_codes
+            old["_occurrence"] = old.groupby("_code").cumcount()
+            new["_occurrence"] = new.groupby("_code").cumcount()
+            on = ["_code", "_occurrence"]
+        merged = old.merge(new, on=on, how="outer", sort=False, validate="one_to_one")
+
+        old_rows = merged["_old_row"].fillna(-1).to_numpy(dtype=np.int64)
+        new_rows = merged["_new_row"].fillna(-1).to_numpy(dtype=np.int64)
+        both = (old_rows >= 0) & (new_rows >= 0)
+        renamed = both & (old_codes[old_rows] != new_codes[new_rows])
+        old_genders = gender_codes(previous["Gender"])
+        new_genders = gender_codes(processed["Gender"])
+        regendered = both & ~renamed & (old_genders[old_rows] != new_genders[new_rows])
+        change = np.select([old_rows < 0, new_rows < 0, renamed, regendered], DELTA_CHANGES, "")
+
+        changed = change != ""
+        old_rows, new_rows = old_rows[changed], new_rows[changed]
+        report = pd.DataFrame({"Change": change[changed]})
+        if key is not None:
+            report[key] = merged[key].to_numpy()[changed]
+        for column, source, rows in [("Previous Name", previous[previous_name_column], old_rows),
+                                     ("Previous Gender", previous["Gender"], old_rows),
+                                     ("Name", processed[name_column], new_rows),
+                                     ("Gender", processed["Gender"], new_rows)]:
+            values = source.to_numpy(dtype=object)[np.maximum(rows, 0)]
+            values[rows < 0] = None
+            report[column] = values
+        report.attrs["key"] = key
+    return report
+
+
+def delta_summary(report):
+    counts = report["Change"].value_counts()
+    return {change: int(counts.get(change, 0)) for change in DELTA_CHANGES}
+
+
+class GenderEngine:
+    def __init__(self, detector=None, country=None, cache=None, table=None, workers=1, fuzzy_distance=0):
+        if country not in TABLE_COUNTRIES:
+            raise ValueError(f"Unknown country: {country}")
+        self._detector = detector
+        self.country = country
+        self.cache = cache
+        self.table = table
+        self.workers = workers
+        self.fuzzy_distance = fuzzy_distance
+        self._fuzzy = None
+        self._pool = None
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            self._detector = Detector()
+        return self._detector
+
+    @property
+    def fuzzy(self):
+        if not self.fuzzy_distance:
+            return None
+        if self._fuzzy is None or self._fuzzy.max_distance != self.fuzzy_distance:
+            names, genders = self._dictionary()
+            self._fuzzy = FuzzyIndex(names, genders, self.fuzzy_distance)
+        return self._fuzzy
+
+    def _dictionary(self):
+        if self.table is not None:
+            names = [key.decode("utf-8") for key in self.table.keys]
+            return names, [GENDERS[code] for code in self.table.codes[:, TABLE_COUNTRIES.index(self.country)]]
+        names = list(self.detector.names)
+        return names, [self._lookup_uncached(name) for name in names]
+
+    def _lookup_uncached(self, first_name):
+        try:
+            return GENDER_MAP.get(self.detector.get_gender(first_name, self.country), "Unknown")
+        except Exception as e:
+            logger.warning("Gender detection error for '%s': %s", first_name, e)
+            METRICS.count("lookup_errors")
+            return "Unknown"
+
+    def _lookup_many_uncached(self, first_names):
+        if self.table is None:
+            METRICS.count("detector_lookups", len(first_names))
+            return [self._lookup_uncached(name) for name in first_names]
+
+        METRICS.count("table_lookups", len(first_names))
+
+        codes = self.table.lookup_codes(first_names, TABLE_COUNTRIES.index(self.country))
+        return [GENDERS[code] if code >= 0 else "Unknown" for code in codes]
+
+    def lookup_first_names(self, first_names):
+        if self.cache is None:
+            return self._lookup_many_uncached(first_names)
+
+        country = self.country or ""
+        known = self.cache.get_many(first_names, country)
+        missing_names = [name for name in first_names if name not in known]
+        METRICS.count("cache_hits", len(known))
+        METRICS.count("cache_misses", len(missing_names))
+        missing = dict(zip(missing_names, self._lookup_many_uncached(missing_names)))
+        self.cache.put_many(missing, country)
+        known.update(missing)
+        return [known[name] for name in first_names]
+
+    def lookup_first_name(self, first_name):
+        return self.lookup_first_names([first_name])[0]
+
+    def detect_gender(self, name):
+        return str(self.classify_names(pd.Series([name], dtype=object)).iloc[0])
+
+    def lookup_normalized(self, first_names):
+        genders = self.lookup_first_names(first_names)
+        compound = [i for i, (name, gender) in enumerate(zip(first_names, genders)) if gender == "Unknown" and "-" in name]
+        if compound:
+            heads = [first_names[i].split("-")[0] for i in compound]
+            for i, gender in zip(compound, self.lookup_first_names(heads)):
+                genders[i] = gender
+        stripped = {i: strip_marks(first_names[i]) for i, gender in enumerate(genders) if gender == "Unknown"}
+        accented = [i for i, name in stripped.items() if name != first_names[i]]
+        if accented:
+            for i, gender in zip(accented, self.lookup_normalized([stripped[i] for i in accented])):
+                genders[i] = gender
+        return genders
+
+    def lookup_matched(self, first_names):
+        genders = self.lookup_normalized(first_names)
+        matches = [None] * len(first_names)
+        if self.fuzzy is not None:
+            unknown = [i for i, gender in enumerate(genders) if gender == "Unknown"]
+            for i, (gender, match) in zip(unknown, self.fuzzy.lookup_many([first_names[i] for i in unknown])):
+                genders[i], matches[i] = gender, match
+        return genders, matches
+
+    def _parallel_pool(self):
+        if self._pool is None:
+            table_path = self.table.path if self.table is not None else None
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.country, table_path))
+        return self._pool
+
+    def _classify_names_parallel(self, names, progress=None):
+        values = names.to_numpy(dtype=object)
+        shards = [values[start:start + PARALLEL_SHARD_SIZE] for start in range(0, len(values), PARALLEL_SHARD_SIZE)]
+        gender_codes = []
+        done = 0
+        for codes in self._parallel_pool().map(_classify_shard, shards):
+            gender_codes.append(codes)
+            done += len(codes)
+            if progress:
+                progress(done, len(values))
+        gender_codes = np.concatenate(gender_codes) if gender_codes else np.array([], dtype=np.int8)
+        return pd.Series(pd.Categorical.from_codes(gender_codes, categories=GENDERS), index=names.index)
+
+    def classify_names(self, names, progress=None):
+        return self.classify_names_matched(names, progress)[0]
+
+    def classify_names_matched(self, names, progress=None):
+        genders = self._classify_names(names, progress)
+        if self.fuzzy is None:
+            return genders, None
+        return self._fuzzy_fallback(names, genders)
+
+    def _fuzzy_fallback(self, names, genders):
+        matched = np.full(len(names), None, dtype=object)
+        unknown = (genders == "Unknown").to_numpy()
+        if unknown.any():
+            codes, first_names = pd.factorize(extract_first_names(names[unknown]))
+            results = self.fuzzy.lookup_many(list(first_names))
+            unique_codes = np.array([GENDERS.index(gender) for gender, _ in results] + [GENDERS.index("Unknown")], dtype=np.int8)
+            unique_matches = np.array([match for _, match in results] + [None], dtype=object)
+            gender_codes = genders.cat.codes.to_numpy().copy()
+            gender_codes[unknown] = unique_codes[codes]
+            matched[unknown] = unique_matches[codes]
+            METRICS.count("fuzzy_matches", int(pd.notna(matched).sum()))
+            genders = pd.Series(pd.Categorical.from_codes(gender_codes, categories=GENDERS), index=names.index)
+        return genders, pd.Series(matched, index=names.index, dtype=object)
+
+    def _classify_names(self, names, progress=None):
+        if self.workers > 1 and len(names) >= PARALLEL_MIN_ROWS:
+            with METRICS.stage("classify_parallel", len(names)):
+                return self._classify_names_parallel(names, progress)
+
+        with METRICS.stage("normalize", len(names)):
+            codes, unique_names = pd.factorize(extract_first_names(names))
+        unique_names = list(unique_names)
+        unique_genders = []
+        with METRICS.stage("lookup", len(unique_names)):
+            for start in range(0, len(unique_names), LOOKUP_CHUNK_SIZE):
+                unique_genders.extend(self.lookup_normalized(unique_names[start:start + LOOKUP_CHUNK_SIZE]))
+                if progress:
+                    progress(len(unique_genders), len(unique_names))
+        unique_codes = np.array([GENDERS.index(gender) for gender in unique_genders], dtype=np.int8)
+        unknown_code = GENDERS.index("Unknown")
+        gender_codes = np.append(unique_codes, np.int8(unknown_code))[codes]
+        return pd.Series(pd.Categorical.from_codes(gender_codes, categories=GENDERS), index=names.index)
+
+    def classify(self, df, name_column, progress=None):
+        processed = df.copy(deep=False)
+        processed["Gender"], matched = self.classify_names_matched(processed[name_column], progress)
+        if matched is not None:
+            processed[MATCH_COLUMN] = matched
+        return processed
+
+    def classify_incremental(self, df, name_column, previous, previous_name_column=None, progress=None):
+        previous_name_column = previous_name_column or name_column
+        with METRICS.stage("match_previous", len(df) + len(previous)):
+            old_codes, new_codes = shared_codes(previous[previous_name_column], df[name_column])
+            known = np.full(max(old_codes.max(initial=-1), new_codes.max(initial=-1)) + 2, -1, dtype=np.int8)
+            known[old_codes] = gender_codes(previous["Gender"])
+            if not self.fuzzy_distance and MATCH_COLUMN in previous.columns:
+                known[old_codes[previous[MATCH_COLUMN].notna().to_numpy()]] = -1
+            codes = known[new_codes]
+            matched = None
+            if self.fuzzy_distance:
+                known_matches = np.full(len(known), None, dtype=object)
+                if MATCH_COLUMN in previous.columns:
+                    known_matches[old_codes] = previous[MATCH_COLUMN].to_numpy(dtype=object)
+                matched = known_matches[new_codes]
+
+        reused = codes >= 0
+        if self.fuzzy_distance and MATCH_COLUMN not in previous.columns:
+            reused &= codes != GENDERS.index("Unknown")
+        if not reused.all():
+            genders, new_matched = self.classify_names_matched(df[name_column][~reused], progress)
+            codes[~reused] = genders.cat.codes.to_numpy()
+            if matched is not None:
+                matched[~reused] = new_matched.to_numpy()
+
+        processed = df.copy(deep=False)
+        processed["Gender"] = pd.Categorical.from_codes(codes, categories=GENDERS)
+        if matched is not None:
+            processed[MATCH_COLUMN] = pd.Series(matched, index=df.index, dtype=object)
+        return processed, int(reused.sum())
+
+    def classify_batch(self, batch, progress=None):
+        loaded = [entry for entry in batch if entry["error"] is None]
+        if not loaded:
+            return batch
+
+        names = pd.concat([entry["data"][entry["name_column"]].astype(object) for entry in loaded], ignore_index=True)
+        genders, matched = self.classify_names_matched(names, progress)
+        codes = genders.cat.codes.to_numpy()
+        start = 0
+        for entry in loaded:
+            stop = start + len(entry["data"])
+            entry["data"] = entry["data"].copy(deep=False)
+            entry["data"]["Gender"] = pd.Categorical.from_codes(codes[start:stop], categories=GENDERS)
+            if matched is not None:
+                entry["data"][MATCH_COLUMN] = matched.iloc[start:stop].to_numpy()
+            start = stop
+        return batch
+
+    def classify_csv_stream(self, input_path, outputs, name_column=None, search_term="",
+                            chunksize=READ_CHUNK_SIZE, progress=None):
+        header = pd.read_csv(input_path, nrows=0)
+        name_column = name_column or find_name_column(header.columns)
+        if name_column not in header.columns:
+            raise ValueError(f"No suitable name column found in {os.path.basename(input_path)}")
+
+        columns = list(header.columns) + ["Gender"] + ([MATCH_COLUMN] if self.fuzzy_distance else [])
+        counts = dict.fromkeys(outputs, 0)
+        writers = {}
+        try:
+            for gender, path in outputs.items():
+                writers[gender] = open(path, 'w', encoding='utf-8-sig', newline='')
+                pd.DataFrame(columns=columns).to_csv(writers[gender], index=False)
+
+            total = os.path.getsize(input_path)
+            with open(input_path, 'rb') as f:
+                reader = pd.read_csv(f, chunksize=chunksize, dtype=str, keep_default_na=False)
+                while True:
+                    with METRICS.stage("read") as stage:
+                        chunk = next(reader, None)
+                        stage["items"] = 0 if chunk is None else len(chunk)
+                    if chunk is None:
+                        break
+                    chunk["Gender"], matched = self.classify_names_matched(chunk[name_column].replace("", np.nan))
+                    if matched is not None:
+                        chunk[MATCH_COLUMN] = matched
+                    for gender, writer in writers.items():
+                        rows = filter_data(chunk, gender, search_term)
+                        with METRICS.stage("write", len(rows)):
+                            rows.to_csv(writer, index=False, header=False)
+                        counts[gender] += len(rows)
+                    if progress:
+                        progress(f.tell(), total)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        return name_column, counts
+
+    def classify_file(self, file_path, name_column=None, fast=False, columns=None):
+        if fast or columns is not None:
+            data, name_column = read_table_fast(file_path, name_column, columns)
+            return self.classify(data, name_column), name_column
+
+        data = read_table(file_path)
+        name_column = name_column or detect_name_column(data)
+        if not name_column:
+            raise ValueError(f"No suitable name column found in {os.path.basename(file_path)}")
+        return self.classify(data, name_column), name_column
+
+    def classify_file_incremental(self, file_path, previous_path, name_column=None):
+        data = read_table(file_path)
+        name_column = name_column or detect_name_column(data)
+        if not name_column:
+            raise ValueError(f"No suitable name column found in {os.path.basename(file_path)}")
+
+        previous = read_table(previous_path)
+        previous_name_column = name_column if name_column in previous.columns else detect_name_column(previous)
+        if not previous_name_column or "Gender" not in previous.columns:
+            raise ValueError(f"{os.path.basename(previous_path)} is not a processed output with a name and Gender column")
+        processed, reused = self.classify_incremental(data, name_column, previous, previous_name_column)
+        return processed, name_column, previous, previous_name_column, reused
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+def _init_worker(country, table_path):
+    global _worker_engine
+    table = NameTable(table_path) if table_path else None
+    _worker_engine = GenderEngine(country=country, table=table)
+    if table is None:
+        _worker_engine.detector
+
+
+def _classify_shard(values):
+    return _worker_engine.classify_names(pd.Series(values, dtype=object)).cat.codes.to_numpy()
+
+
+def build_name_table(path=DEFAULT_TABLE_PATH):
+    detector = Detector()
+    names = list(detector.names)
+    codes = [[GENDERS.index(GENDER_MAP.get(detector.get_gender(name, country), "Unknown")) for country in TABLE_COUNTRIES]
+             for name in names]
+    save_name_table(path, names, codes, detector_fingerprint(detector.case_sensitive))
+    return NameTable(path)
+
+
+def load_name_table(path=DEFAULT_TABLE_PATH):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        table = NameTable(path)
+    except (ValueError, OSError) as e:
+        logger.warning("Name table unusable at '%s': %s", path, e)
+        return None
+    if table.fingerprint != detector_fingerprint():
+        logger.warning("Name table at '%s' is out of date; rebuild it with 'python lookup_table.py'", path)
+        return None
+    return table
+
+
+def create_engine(cache_path=DEFAULT_CACHE_PATH, country=None, table_path=DEFAULT_TABLE_PATH, workers=1, fuzzy_distance=0):
+    table = load_name_table(table_path)
+    if table is not None:
+        return GenderEngine(country=country, table=table, workers=workers, fuzzy_distance=fuzzy_distance)
+
+    cache = None
+    if cache_path:
+        try:
+            cache = NameCache(cache_path, fingerprint=detector_fingerprint())
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Name cache unavailable at '%s': %s", cache_path, e)
+    return GenderEngine(country=country, cache=cache, workers=workers, fuzzy_distance=fuzzy_distance)
@@ -0,0 +1,108 @@
+import numpy as np
+from metrics import METRICS
+
+DEFAULT_MAX_DISTANCE = 2
+LETTERS_PER_EDIT = 4
+
+
+def deletes(word, distance):
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def common_prefix(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    def __init__(self, names, genders, max_distance=DEFAULT_MAX_DISTANCE):
+        with METRICS.stage("fuzzy_index_build", len(names)):
+            self._build(names, genders, max_distance)
+
+    def _build(self, names, genders, max_distance):
+        self.max_distance = max_distance
+        self.known = {name.lower() for name in names}
+        decided = [(name, gender) for name, gender in zip(names, genders) if gender != "Unknown"]
+        self.names = [name for name, _ in decided]
+        self.genders = [gender for _, gender in decided]
+        self.keys = [name.lower() for name in self.names]
+
+        hashes = []
+        ids = []
+        for i, key in enumerate(self.keys):
+            variants = [hash(variant) for variant in deletes(key, self.allowed_distance(key, LETTERS_PER_EDIT - 1))]
+            hashes.extend(variants)
+            ids.extend([i] * len(variants))
+        hashes = np.array(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.ids = np.array(ids, dtype=np.int32)[order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def allowed_distance(self, key, letters_per_edit=LETTERS_PER_EDIT):
+        return min(self.max_distance, len(key) // letters_per_edit)
+
+    def lookup(self, name):
+        key = name.lower()
+        distance = self.allowed_distance(key)
+        if key in self.known or distance == 0:
+            return "Unknown", None
+
+        query = np.array([hash(variant) for variant in deletes(key, distance)], dtype=np.int64)
+        starts = np.searchsorted(self.hashes, query, side="left")
+        stops = np.searchsorted(self.hashes, query, side="right")
+        candidates = set()
+        for start, stop in zip(starts[starts < stops], stops[starts < stops]):
+            candidates.update(self.ids[start:stop].tolist())
+
+        best = distance + 1
+        matches = []
+        for candidate in candidates:
+            candidate_distance = edit_distance(key, self.keys[candidate], best)
+            if candidate_distance < best:
+                best, matches = candidate_distance, [candidate]
+            elif candidate_distance == best:
+                matches.append(candidate)
+
+        if not matches:
+            return "Unknown", None
+        prefixes = [common_prefix(key, self.keys[candidate]) for candidate in matches]
+        longest = max(prefixes)
+        matches = [candidate for candidate, prefix in zip(matches, prefixes) if prefix == longest]
+        genders = {self.genders[candidate] for candidate in matches}
+        if len(genders) != 1:
+            return "Unknown", None
+        return genders.pop(), self.names[min(matches, key=lambda candidate: self.keys[candidate])]
+
+    def lookup_many(self, names):
+        with METRICS.stage("fuzzy_lookup", len(names)):
+            return [self.lookup(name) for name in names]
@@ -1,11 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
-import re
-from gender_guesser.detector import Detector
+import numpy as np
 import pandas as pd
-from ctypes import windll
-windll.shcore.SetProcessDpiAwareness(1)
+from virtual_grid import VirtualGrid
+from tasks import TaskCancelled, TaskRunner
+from fuzzy_index import DEFAULT_MAX_DISTANCE
+from group_stats import GroupStats
+from search_index import IncrementalSearch, SearchIndex
+from session import SESSION_EXTENSION, load_session, save_session
+from metrics import METRICS
+from engine import (GENDERS, MATCH_COLUMN, NAME_COLUMNS, batch_stats, compact_table, create_engine, delta_report,
+                    delta_summary, detect_name_column, export_format_for, export_split, filter_data, gender_masks,
+                    memory_usage_mb, merge_batch, read_batch, read_table, shared_key, split_outputs, split_path_pattern,
+                    write_table)
+
+SEARCH_DEBOUNCE_MS = 250
+
+try:
+    from ctypes import windll
+    windll.shcore.SetProcessDpiAwareness(1)
+except (ImportError, AttributeError, OSError):
+    pass
 
 class EmployeeGenderClassifier:
     _translations = {
@@ -14,40 +30,103 @@ class EmployeeGenderClassifier:
         "filter_frame": "Filter By Gender",
         "search_frame": "Search",
         "import": "Import File",
+        "import_batch": "Import Files",
         "detect": "Detect Gender",
+        "detect_changes": "Detect Changes",
         "export_males": "Export Males",
         "export_females": "Export Females",
         "export_unknown": "Export Unknown",
         "export_all": "Export All",
+        "export_split": "Export Split",
         "stats": "Show Stats",
         "clear": "Clear Data",
+        "open_session": "Open Session",
+        "save_session": "Save Session",
         "all": "All",
         "male": "Male",
         "female": "Female",
         "unknown": "Unknown",
+        "fuzzy": "Fuzzy-match unknown names",
         "search": "Search",
+        "search_error": "Search Error",
         "ready": "Ready",
         "file_types": [("Excel files", "*.xlsx;*.xls"), ("CSV files", "*.csv"), ("All files", "*.*")],
         "import_title": "Select File",
         "import_error": "Import Error",
-        "import_success": "Loaded {} records from {}",
+        "import_success": "Loaded {} records from {} ({:.1f} MB in memory)",
+        "import_batch_title": "Select Files",
+        "import_batch_none": "None of the selected files could be imported.",
+        "import_batch_success": "Loaded and classified {} records from {} of {} files ({:.1f} MB in memory)",
+        "import_batch_stats_title": "Batch Import Summary",
+        "import_batch_stats_line": "{}: {} rows via '{}' ({} Male, {} Female, {} Unknown)",
+        "import_batch_error_line": "{}: {}",
         "import_no_name": "No suitable name column found (e.g., 'first name', 'name'). Please ensure one exists.",
         "detect_no_data": "No data loaded",
         "detect_no_name": "Name column not identified. Please import data first.",
-        "detect_complete": "Gender detection complete. {} records processed.",
+        "detect_complete": "Gender detection complete. {} records processed ({:.1f} MB in memory).",
+        "detect_error": "Detection Error",
+        "detect_changes_title": "Select Previous Output",
+        "detect_changes_no_gender": "The selected file has no Gender column. Choose a file exported with gender.",
+        "detect_changes_complete": "Reused {} of {} genders, classified {} new names. Changes: {} added, {} removed, {} renamed, {} reclassified.",
+        "detect_changes_save": "Save the report of {} changed employees?",
+        "detect_changes_report_title": "Save Change Report As",
+        "detect_changes_report_success": "Saved {} changes to {}",
         "export_no_data": "No processed data to export.",
         "export_none_found": "No {} employees found.",
         "export_title": "Save {} Employees As",
         "export_success": "Saved {} {} employees to {}",
         "export_error": "Export Error",
+        "export_file_types": [("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("Parquet files", "*.parquet"),
+                              ("Arrow IPC files", "*.arrow;*.feather"), ("All files", "*.*")],
+        "export_missing_library": "Exporting to {} requires the '{}' library.\nPlease install it (pip install {}) and try again.",
         "export_all_title": "Save All Data with Gender As",
         "export_all_success": "Saved all {} records with gender to {}",
+        "export_split_title": "Save Gender Split As",
+        "export_split_success": "Saved {} Male, {} Female and {} Unknown employees ({} total) next to {}",
         "stats_no_data": "No processed data to analyze.",
         "stats_title": "Gender Statistics",
-        "stats_message": "Gender Distribution:\n\n{}\n\nTotal Records: {}",
-        "stats_line": "{}: {} ({:.1f}%)",
+        "stats_line": "{}: {:,} ({:.1f}%)",
+        "stats_total": "Total: {:,}",
+        "stats_group_by": "Group by:",
+        "stats_current_view": "Current filter/search only",
+        "stats_no_groups": "(no column with few enough distinct values)",
+        "stats_export": "Export...",
+        "stats_export_title": "Save Gender Breakdown As",
+        "stats_export_success": "Saved gender breakdown with {} rows to {}",
         "clear_confirm_title": "Confirm Clear",
-        "clear_confirm_msg": "Are you sure you want to clear all loaded and processed data?"
+        "clear_confirm_msg": "Are you sure you want to clear all loaded and processed data?",
+        "session_file_types": [("Saved sessions", "*" + SESSION_EXTENSION), ("All files", "*.*")],
+        "session_open_title": "Open Session",
+        "session_save_title": "Save Session As",
+        "session_error": "Session Error",
+        "session_missing_library": "Sessions require the 'pyarrow' library.\nPlease install it (pip install pyarrow) and try again.",
+        "session_saved": "Saved session with {} records to {}",
+        "session_loaded": "Restored {} records from {} ({:.1f} MB in memory)",
+        "cancel": "Cancel",
+        "cancelled": "Operation cancelled",
+        "task_running": "{}...",
+        "task_progress": "{}... {:.0f}% (ETA {})",
+        "task_import": "Importing {}",
+        "task_import_batch": "Importing {} files",
+        "task_detect": "Detecting gender",
+        "task_detect_changes": "Comparing with {}",
+        "task_search": "Searching",
+        "task_index": "Indexing for search",
+        "task_export": "Exporting {}",
+        "task_session_save": "Saving session {}",
+        "task_session_open": "Opening session {}",
+        "task_stats": "Computing statistics",
+        "diagnostics": "Diagnostics",
+        "diagnostics_title": "Pipeline Diagnostics",
+        "diagnostics_columns": ["Stage / Counter", "Calls", "Total ms", "Avg ms", "Items", "Items/s"],
+        "diagnostics_refresh": "Refresh",
+        "diagnostics_reset": "Reset",
+        "diagnostics_save": "Save Metrics...",
+        "diagnostics_profile": "Profile operations",
+        "diagnostics_profile_title": "Select Folder for Profiles",
+        "diagnostics_save_title": "Save Metrics As",
+        "diagnostics_saved": "Saved metrics to {}",
+        "timing_line": "{} {:.0f} ms"
     }
 
     def __init__(self, root):
@@ -100,6 +179,7 @@ class EmployeeGenderClassifier:
                         fieldbackground="white",
                         foreground=self.text_color,
                         borderwidth=0,
+                        rowheight=22,
                         font=('Segoe UI', 9))
         style.configure("Treeview.Heading",
                         background=self.primary_color,
@@ -128,17 +208,33 @@ class EmployeeGenderClassifier:
         self.root.title(self._translations["title"])
         self.root.geometry("1200x700")
 
-        self.name_columns = ["first name", "name"]
-        self.gender_detector = Detector()
+        self.name_columns = NAME_COLUMNS
+        self.engine = create_engine()
 
         self.original_data = pd.DataFrame()
         self.processed_data = pd.DataFrame()
         self.name_column = None
         self.current_filter = "All"
+        self.search_index = None
+        self._base_index = None
+        self._index_task = None
+        self._searcher = None
+        self._gender_masks = None
+        self._applied_search = ""
+        self._search_after_id = None
+        self._metrics_mark = {}
+        self.diagnostics_window = None
+        self.group_stats = None
+        self._view_rows = None
+        self.stats_window = None
+
+        self.tasks = TaskRunner(self.root, self._on_task_progress, self._on_tasks_idle, max_workers=2)
+        self._search_task = None
 
         self._create_widgets()
         self._setup_ui_text()
         self._configure_grid()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def _configure_grid(self):
         self.root.columnconfigure(0, weight=1)
@@ -172,22 +268,32 @@ class EmployeeGenderClassifier:
         self.display_frame.grid(row=1, column=0, sticky="nsew")
 
         self.btn_import = ttk.Button(self.control_frame, command=self.import_file)
+        self.btn_import_batch = ttk.Button(self.control_frame, command=self.import_files)
         self.btn_detect = ttk.Button(self.control_frame, command=self.detect_gender_from_data, state=tk.DISABLED)
+        self.btn_detect_changes = ttk.Button(self.control_frame, command=self.detect_changes, state=tk.DISABLED)
         self.btn_export_males = ttk.Button(self.control_frame, command=lambda: self.export_by_gender("Male"), state=tk.DISABLED)
         self.btn_export_females = ttk.Button(self.control_frame, command=lambda: self.export_by_gender("Female"), state=tk.DISABLED)
         self.btn_export_unknown = ttk.Button(self.control_frame, command=lambda: self.export_by_gender("Unknown"), state=tk.DISABLED)
         self.btn_export_all = ttk.Button(self.control_frame, command=self.export_all_with_gender, state=tk.DISABLED)
+        self.btn_export_split = ttk.Button(self.control_frame, command=self.export_split_by_gender, state=tk.DISABLED)
         self.btn_stats = ttk.Button(self.control_frame, command=self.show_stats, state=tk.DISABLED)
         self.btn_clear = ttk.Button(self.control_frame, command=self.clear_data, state=tk.DISABLED)
+        self.btn_open_session = ttk.Button(self.control_frame, command=self.open_session)
+        self.btn_save_session = ttk.Button(self.control_frame, command=self.save_session, state=tk.DISABLED)
 
         self.btn_import.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
         self.btn_detect.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         self.btn_export_males.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
         self.btn_export_females.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
         self.btn_export_unknown.grid(row=1, column=2, padx=5, pady=5, sticky="ew")
+        self.btn_export_split.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
         self.btn_export_all.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
         self.btn_stats.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
         self.btn_clear.grid(row=2, column=2, padx=5, pady=5, sticky="ew")
+        self.btn_detect_changes.grid(row=3, column=0, padx=5, pady=5, sticky="ew")
+        self.btn_import_batch.grid(row=3, column=1, padx=5, pady=5, sticky="ew")
+        self.btn_open_session.grid(row=4, column=0, padx=5, pady=5, sticky="ew")
+        self.btn_save_session.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
 
         self.filter_var = tk.StringVar(value="All")
         self.radio_all = ttk.Radiobutton(self.filter_frame, value="All", variable=self.filter_var, command=self.apply_filter, state=tk.DISABLED)
@@ -200,26 +306,40 @@ class EmployeeGenderClassifier:
         self.radio_female.grid(row=0, column=2, padx=5, sticky='w')
         self.radio_unknown.grid(row=0, column=3, padx=5, sticky='w')
 
+        self.fuzzy_var = tk.BooleanVar(value=bool(self.engine.fuzzy_distance))
+        self.check_fuzzy = ttk.Checkbutton(self.filter_frame, variable=self.fuzzy_var, command=self._toggle_fuzzy)
+        self.check_fuzzy.grid(row=1, column=0, columnspan=4, padx=5, pady=(5, 0), sticky='w')
+
         self.search_var = tk.StringVar()
         self.search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var, width=25, state=tk.DISABLED)
         self.search_entry.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
         self.btn_search = ttk.Button(self.search_frame, command=self.apply_search, state=tk.DISABLED)
         self.search_entry.bind("<Return>", lambda event: self.apply_search())
+        self.search_var.trace_add("write", self._on_search_typed)
         self.btn_search.grid(row=0, column=2, padx=5, pady=5)
 
-        self.tree = ttk.Treeview(self.display_frame, show="headings", selectmode="extended", height=20)
-
-        vsb = ttk.Scrollbar(self.display_frame, orient="vertical", command=self.tree.yview)
-        hsb = ttk.Scrollbar(self.display_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.data_grid = VirtualGrid(self.display_frame)
+        self.tree = self.data_grid.tree
+        self.data_grid.grid(row=0, column=0)
 
-        self.tree.grid(row=0, column=0, sticky='nsew')
-        vsb.grid(row=0, column=1, sticky='ns')
-        hsb.grid(row=1, column=0, sticky='ew')
+        self.status_frame = ttk.Frame(self.root)
+        self.status_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 5))
+        self.status_frame.columnconfigure(0, weight=1)
 
         self.status_var = tk.StringVar()
-        self.status_bar = ttk.Label(self.root, textvariable=self.status_var, relief="sunken", padding="5")
-        self.status_bar.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 5))
+        self.status_bar = ttk.Label(self.status_frame, textvariable=self.status_var, relief="sunken", padding="5")
+        self.status_bar.grid(row=0, column=0, sticky="ew")
+        self.progress_bar = ttk.Progressbar(self.status_frame, orient="horizontal", length=200, maximum=100)
+        self.progress_bar.grid(row=0, column=1, padx=(5, 0), sticky="ns")
+        self.btn_cancel = ttk.Button(self.status_frame, command=self.cancel_task)
+        self.btn_cancel.grid(row=0, column=2, padx=(5, 0))
+        self.timing_var = tk.StringVar()
+        self.timing_label = ttk.Label(self.status_frame, textvariable=self.timing_var, relief="sunken", padding="5")
+        self.timing_label.grid(row=0, column=3, padx=(5, 0), sticky="ns")
+        self.btn_diagnostics = ttk.Button(self.status_frame, command=self.show_diagnostics)
+        self.btn_diagnostics.grid(row=0, column=4, padx=(5, 0))
+        self.progress_bar.grid_remove()
+        self.btn_cancel.grid_remove()
 
     def _setup_ui_text(self):
         self.control_frame.config(text=self._translations["control_frame_title"])
@@ -227,34 +347,50 @@ class EmployeeGenderClassifier:
         self.search_frame.config(text=self._translations["search_frame"])
 
         self.btn_import.config(text=self._translations["import"])
+        self.btn_import_batch.config(text=self._translations["import_batch"])
         self.btn_detect.config(text=self._translations["detect"])
+        self.btn_detect_changes.config(text=self._translations["detect_changes"])
         self.btn_export_males.config(text=self._translations["export_males"])
         self.btn_export_females.config(text=self._translations["export_females"])
         self.btn_export_unknown.config(text=self._translations["export_unknown"])
         self.btn_export_all.config(text=self._translations["export_all"])
+        self.btn_export_split.config(text=self._translations["export_split"])
         self.btn_stats.config(text=self._translations["stats"])
         self.btn_clear.config(text=self._translations["clear"])
+        self.btn_open_session.config(text=self._translations["open_session"])
+        self.btn_save_session.config(text=self._translations["save_session"])
 
         self.radio_all.config(text=self._translations["all"])
         self.radio_male.config(text=self._translations["male"])
         self.radio_female.config(text=self._translations["female"])
         self.radio_unknown.config(text=self._translations["unknown"])
+        self.check_fuzzy.config(text=self._translations["fuzzy"])
 
         self.btn_search.config(text=self._translations["search"])
+        self.btn_cancel.config(text=self._translations["cancel"])
+        self.btn_diagnostics.config(text=self._translations["diagnostics"])
         self.status_var.set(self._translations["ready"])
 
     def _update_widget_states(self):
         has_original_data = not self.original_data.empty
         has_processed_data = not self.processed_data.empty
-
-        self.btn_detect.config(state=tk.NORMAL if has_original_data and self.name_column else tk.DISABLED)
-        self.btn_clear.config(state=tk.NORMAL if has_original_data or has_processed_data else tk.DISABLED)
-
-        export_state = tk.NORMAL if has_processed_data else tk.DISABLED
+        idle = not self.tasks.busy
+
+        self.btn_import.config(state=tk.NORMAL if idle else tk.DISABLED)
+        self.btn_import_batch.config(state=tk.NORMAL if idle else tk.DISABLED)
+        self.btn_detect.config(state=tk.NORMAL if idle and has_original_data and self.name_column else tk.DISABLED)
+        self.btn_detect_changes.config(state=tk.NORMAL if idle and has_original_data and self.name_column else tk.DISABLED)
+        self.btn_clear.config(state=tk.NORMAL if idle and (has_original_data or has_processed_data) else tk.DISABLED)
+        self.btn_open_session.config(state=tk.NORMAL if idle else tk.DISABLED)
+        self.btn_save_session.config(state=tk.NORMAL if idle and (has_original_data or has_processed_data) else tk.DISABLED)
+        self.check_fuzzy.config(state=tk.NORMAL if idle else tk.DISABLED)
+
+        export_state = tk.NORMAL if idle and has_processed_data else tk.DISABLED
         self.btn_export_males.config(state=export_state)
         self.btn_export_females.config(state=export_state)
         self.btn_export_unknown.config(state=export_state)
         self.btn_export_all.config(state=export_state)
+        self.btn_export_split.config(state=export_state)
         self.btn_stats.config(state=export_state)
 
         filter_state = tk.NORMAL if has_processed_data else tk.DISABLED
@@ -267,6 +403,67 @@ class EmployeeGenderClassifier:
         self.search_entry.config(state=search_state)
         self.btn_search.config(state=search_state)
 
+    def _format_duration(self, seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+    def _on_task_progress(self, task):
+        self.progress_bar.grid()
+        self.btn_cancel.grid()
+        fraction = task.fraction
+        if fraction is None:
+            if str(self.progress_bar.cget("mode")) != "indeterminate":
+                self.progress_bar.config(mode="indeterminate")
+                self.progress_bar.start(15)
+            self.status_var.set(self._translations["task_running"].format(task.label))
+            return
+
+        if str(self.progress_bar.cget("mode")) != "determinate":
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate")
+        self.progress_bar["value"] = fraction * 100
+        eta = task.eta()
+        eta_text = self._format_duration(eta) if eta is not None else "--:--"
+        self.status_var.set(self._translations["task_progress"].format(task.label, fraction * 100, eta_text))
+
+    def _on_tasks_idle(self):
+        self.progress_bar.stop()
+        self.progress_bar["value"] = 0
+        self.progress_bar.grid_remove()
+        self.btn_cancel.grid_remove()
+        self._update_widget_states()
+        self.root.after_idle(self._show_timings)
+
+    def _mark_metrics(self):
+        if not self.tasks.active:
+            self._metrics_mark = {name: stage["seconds"] for name, stage in METRICS.snapshot()["stages"].items()}
+
+    def _show_timings(self):
+        stages = METRICS.snapshot()["stages"]
+        timings = [(name, stage["seconds"] - self._metrics_mark.get(name, 0.0)) for name, stage in stages.items()]
+        self.timing_var.set(" | ".join(self._translations["timing_line"].format(name, seconds * 1000)
+                                       for name, seconds in timings if seconds > 0))
+        if self.diagnostics_window is not None:
+            self._refresh_diagnostics()
+
+    def _run_task(self, label, func, on_done, on_error):
+        self._mark_metrics()
+        profile_name = "".join(c if c.isalnum() else "-" for c in label.lower())
+        task = self.tasks.submit(label, lambda task: METRICS.run_profiled(profile_name, func, task), on_done, on_error)
+        self._update_widget_states()
+        return task
+
+    def cancel_task(self):
+        self.tasks.cancel()
+
+    def _task_failed(self, error, title, message):
+        if isinstance(error, TaskCancelled):
+            self.status_var.set(self._translations["cancelled"])
+            return False
+        messagebox.showerror(title, f"{message}\n{str(error)}")
+        return True
+
     def import_file(self):
         file_path = filedialog.askopenfilename(
             title=self._translations["import_title"],
@@ -275,49 +472,92 @@ class EmployeeGenderClassifier:
         if not file_path:
             return
 
-        try:
-            if file_path.lower().endswith('.csv'):
-                self.original_data = pd.read_csv(file_path)
-            else:
-                self.original_data = pd.read_excel(file_path)
+        self._run_task(
+            self._translations["task_import"].format(os.path.basename(file_path)),
+            lambda task: self._load_file(file_path, task),
+            lambda data: self._on_import_done(file_path, data),
+            self._on_import_failed)
 
-            self.name_column = self._detect_name_column()
-            if not self.name_column:
-                messagebox.showerror(self._translations["import_error"], self._translations["import_no_name"])
-                self.original_data = pd.DataFrame()
-                return
-
-            self.processed_data = pd.DataFrame()
-            self.current_filter = "All"
-            self.filter_var.set("All")
-            self.search_var.set("")
-            self.update_display(self.original_data)
-            self.status_var.set(self._translations["import_success"].format(len(self.original_data), os.path.basename(file_path)))
-            self._update_widget_states()
+    def _load_file(self, file_path, task):
+        return compact_table(read_table(file_path, task.report))
 
-        except Exception as e:
-            messagebox.showerror(self._translations["import_error"], f"Failed to import file:\n{str(e)}")
+    def _on_import_done(self, file_path, data):
+        self._drop_index()
+        self.original_data = data
+        self.name_column = self._detect_name_column()
+        if not self.name_column:
+            messagebox.showerror(self._translations["import_error"], self._translations["import_no_name"])
             self.original_data = pd.DataFrame()
-            self.processed_data = pd.DataFrame()
-            self.update_display(self.original_data)
-            self.status_var.set(self._translations["import_error"])
             self._update_widget_states()
+            return
 
-    def _detect_name_column(self):
-        if self.original_data.empty:
-            return None
+        self.processed_data = pd.DataFrame()
+        self._gender_masks = None
+        self.current_filter = "All"
+        self.filter_var.set("All")
+        self._reset_search()
+        self.update_display(self.original_data)
+        self.status_var.set(self._translations["import_success"].format(
+            len(self.original_data), os.path.basename(file_path), memory_usage_mb(self.original_data)))
+        self._update_widget_states()
+        self._build_index(self.original_data)
 
-        for col in self.original_data.columns:
-            col_lower = str(col).strip().lower()
-            for name_var in self.name_columns:
-                if name_var == col_lower:
-                    return col
-        for col in self.original_data.columns:
-            col_lower = str(col).strip().lower()
-            for name_var in self.name_columns:
-                if name_var in col_lower:
-                    return col
-        return None
+    def import_files(self):
+        file_paths = filedialog.askopenfilenames(
+            title=self._translations["import_batch_title"],
+            filetypes=self._translations["file_types"])
+
+        if not file_paths:
+            return
+
+        self._run_task(
+            self._translations["task_import_batch"].format(len(file_paths)),
+            lambda task: self._load_files(list(file_paths), task),
+            lambda result: self._on_import_files_done(*result),
+            self._on_import_failed)
+
+    def _load_files(self, file_paths, task):
+        batch = self.engine.classify_batch(read_batch(file_paths, progress=task.report), task.report)
+        data = compact_table(merge_batch(batch))
+        return data, batch_stats(batch)
+
+    def _on_import_files_done(self, data, stats):
+        lines = [self._translations["import_batch_error_line"].format(row["File"], row["Error"]) if row["Error"] else
+                 self._translations["import_batch_stats_line"].format(row["File"], row["Rows"], row["Name Column"],
+                                                                      row["Male"], row["Female"], row["Unknown"])
+                 for _, row in stats.iterrows()]
+        if data.empty:
+            messagebox.showerror(self._translations["import_error"],
+                                 self._translations["import_batch_none"] + "\n\n" + "\n".join(lines))
+            return
+
+        self._drop_index()
+        self.original_data = data
+        self.processed_data = data
+        self.name_column = None
+        self._gender_masks = None
+        self.current_filter = "All"
+        self.filter_var.set("All")
+        self._reset_search()
+        self.update_display(self.processed_data)
+        self.status_var.set(self._translations["import_batch_success"].format(
+            len(data), (stats["Error"] == "").sum(), len(stats), memory_usage_mb(data)))
+        self._update_widget_states()
+        self._build_index(data)
+        messagebox.showinfo(self._translations["import_batch_stats_title"], "\n".join(lines))
+
+    def _on_import_failed(self, error):
+        if not self._task_failed(error, self._translations["import_error"], "Failed to import file:"):
+            return
+        self._drop_index()
+        self.original_data = pd.DataFrame()
+        self.processed_data = pd.DataFrame()
+        self.update_display(self.original_data)
+        self.status_var.set(self._translations["import_error"])
+        self._update_widget_states()
+
+    def _detect_name_column(self):
+        return detect_name_column(self.original_data, self.name_columns)
 
     def detect_gender_from_data(self):
         if self.original_data.empty:
@@ -328,44 +568,138 @@ class EmployeeGenderClassifier:
             messagebox.showerror(self._translations["detect_no_name"], self._translations["detect_no_name"])
             return
 
-        self.processed_data = self.original_data.copy()
+        original_data = self.original_data
+        name_column = self.name_column
+        previous_data = self.processed_data
+        self._run_task(
+            self._translations["task_detect"],
+            lambda task: self._classify(original_data, name_column, previous_data, task),
+            self._on_detect_done,
+            lambda error: self._task_failed(error, self._translations["detect_error"], "Gender detection failed:"))
+
+    def _classify(self, original_data, name_column, previous_data, task):
+        if previous_data.empty:
+            processed_data = self.engine.classify(original_data, name_column, task.report)
+        else:
+            processed_data, _ = self.engine.classify_incremental(original_data, name_column, previous_data, progress=task.report)
+        return processed_data
+
+    def detect_changes(self):
+        if self.original_data.empty or not self.name_column:
+            messagebox.showwarning(self._translations["detect_no_data"], self._translations["detect_no_data"])
+            return
+
+        file_path = filedialog.askopenfilename(
+            title=self._translations["detect_changes_title"],
+            filetypes=self._translations["file_types"])
+
+        if not file_path:
+            return
 
-        self.processed_data["Gender"] = self.processed_data[self.name_column].apply(
-            lambda x: self._detect_gender(str(x)) if pd.notna(x) else "Unknown")
+        original_data = self.original_data
+        name_column = self.name_column
+        self._run_task(
+            self._translations["task_detect_changes"].format(os.path.basename(file_path)),
+            lambda task: self._classify_changes(original_data, name_column, file_path, task),
+            lambda result: self._on_changes_done(*result),
+            lambda error: self._task_failed(error, self._translations["detect_error"], "Change detection failed:"))
+
+    def _classify_changes(self, original_data, name_column, file_path, task):
+        previous_data = read_table(file_path, task.report)
+        previous_name_column = name_column if name_column in previous_data.columns else detect_name_column(previous_data)
+        if not previous_name_column or "Gender" not in previous_data.columns:
+            raise ValueError(self._translations["detect_changes_no_gender"])
+
+        processed_data, reused = self.engine.classify_incremental(
+            original_data, name_column, previous_data, previous_name_column, task.report)
+        report = delta_report(previous_data, processed_data, name_column, previous_name_column,
+                              shared_key(previous_data, processed_data))
+        return processed_data, reused, report
+
+    def _on_changes_done(self, processed_data, reused, report):
+        self._on_detect_done(processed_data)
+        summary = delta_summary(report)
+        self.status_var.set(self._translations["detect_changes_complete"].format(
+            reused, len(processed_data), len(processed_data) - reused, summary["added"], summary["removed"],
+            summary["renamed"], summary["gender_changed"]))
+        if not report.empty and messagebox.askyesno(self._translations["detect_changes"],
+                                                    self._translations["detect_changes_save"].format(len(report))):
+            self._export_data(
+                data_to_export=report,
+                title=self._translations["detect_changes_report_title"],
+                initial_filename="employee_changes.xlsx",
+                success_message_template=self._translations["detect_changes_report_success"]
+            )
 
+    def _on_detect_done(self, processed_data):
+        if self._current_stats() is not None and len(processed_data) == len(self.processed_data):
+            self.group_stats.update(processed_data)
+        self.processed_data = processed_data
+        self._gender_masks = None
         self.current_filter = "All"
         self.filter_var.set("All")
-        self.search_var.set("")
+        self._reset_search()
         self.update_display(self.processed_data)
-        self.status_var.set(self._translations["detect_complete"].format(len(self.processed_data)))
+        self.status_var.set(self._translations["detect_complete"].format(
+            len(self.processed_data), memory_usage_mb(self.processed_data)))
         self._update_widget_states()
+        self._build_index(self.processed_data, self._index_for(self.original_data),
+                          [col for col in ("Gender", MATCH_COLUMN) if col in self.processed_data.columns])
+
+    def _toggle_fuzzy(self):
+        self.engine.fuzzy_distance = DEFAULT_MAX_DISTANCE if self.fuzzy_var.get() else 0
 
     def _detect_gender(self, name):
-        try:
-            name = re.sub(r'^\w+\.\s*', '', name).strip()
-            first_name = name.split()[0] if name else ""
-            if not first_name:
-                return "Unknown"
-
-            gender = self.gender_detector.get_gender(first_name)
-
-            gender_map = {
-                "male": "Male",
-                "mostly_male": "Male",
-                "female": "Female",
-                "mostly_female": "Female",
-                "andy": "Unknown",
-                "unknown": "Unknown"
-            }
-
-            return gender_map.get(gender, "Unknown")
-        except Exception as e:
-            print(f"Gender detection error for '{name}': {e}")
-            return "Unknown"
+        return self.engine.detect_gender(name)
 
     def _get_current_display_data(self):
         return self.processed_data if not self.processed_data.empty else self.original_data
 
+    def _index_for(self, data):
+        for search_index in (self.search_index, self._base_index):
+            if search_index is not None and search_index.source is data:
+                return search_index
+        return None
+
+    def _build_index(self, data, base=None, columns=()):
+        if self._index_task is not None:
+            self._index_task.cancel()
+        task = None
+
+        def on_done(search_index):
+            if task is self._index_task:
+                self._index_task = None
+            self._set_index(search_index)
+
+        def on_error(error):
+            if task is self._index_task:
+                self._index_task = None
+            if not isinstance(error, TaskCancelled):
+                self._task_failed(error, self._translations["search_error"], "Failed to index data for search:")
+
+        task = self.tasks.submit(
+            self._translations["task_index"],
+            lambda task: SearchIndex(data, task.report) if base is None else base.extended(data, columns, task.report),
+            on_done,
+            on_error,
+            background=True)
+        self._index_task = task
+
+    def _set_index(self, search_index):
+        if search_index.source is self.original_data:
+            self._base_index = search_index
+        if search_index.source is self._get_current_display_data():
+            self.search_index = search_index
+            self._searcher = None
+
+    def _drop_index(self):
+        if self._index_task is not None:
+            self._index_task.cancel()
+            self._index_task = None
+        self.search_index = None
+        self._base_index = None
+        self._searcher = None
+
     def apply_filter(self):
         if self.processed_data.empty:
             self.update_display(self.processed_data)
@@ -374,32 +708,79 @@ class EmployeeGenderClassifier:
         self.current_filter = self.filter_var.get()
         self.apply_search()
 
+    def _reset_search(self):
+        self.search_var.set("")
+        self._applied_search = ""
+        self._searcher = None
+
+    def _on_search_typed(self, *args):
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self._apply_typed_search)
+
+    def _apply_typed_search(self):
+        self._search_after_id = None
+        if self.search_var.get().strip().lower() != self._applied_search:
+            self.apply_search()
+
+    def _filter_rows(self, base_data, search_mask):
+        gender_mask = None
+        if not self.processed_data.empty and self.current_filter != "All":
+            if self._gender_masks is None:
+                self._gender_masks = gender_masks(self.processed_data)
+            gender_mask = self._gender_masks[self.current_filter]
+
+        if search_mask is None and gender_mask is None:
+            return None
+        if search_mask is None:
+            return np.flatnonzero(gender_mask)
+        if gender_mask is None:
+            return np.flatnonzero(search_mask)
+        return np.flatnonzero(search_mask & gender_mask)
+
     def apply_search(self):
         base_data = self._get_current_display_data()
+        self._applied_search = self.search_var.get().strip().lower()
         if base_data.empty:
             self.update_display(base_data)
             self.update_status(0)
             return
 
-        if not self.processed_data.empty and self.current_filter != "All":
-            filtered_data = self.processed_data[
-                self.processed_data["Gender"] == self.current_filter
-            ]
-        else:
-            filtered_data = base_data.copy()
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+        if self._searcher is None or self._searcher.df is not base_data:
+            self._searcher = IncrementalSearch(base_data, self._index_for(base_data))
 
-        search_term = self.search_var.get().strip().lower()
+        search_term = self.search_var.get()
+        if not search_term.strip():
+            self._show_search_result(None, base_data, None)
+            return
 
-        if search_term:
-            mask = pd.Series(False, index=filtered_data.index)
-            for col in filtered_data.columns:
-                mask = mask | filtered_data[col].astype(str).str.lower().str.contains(search_term, na=False)
-            search_result_data = filtered_data[mask]
-        else:
-            search_result_data = filtered_data
+        searcher = self._searcher
+        task = None
+        self._mark_metrics()
 
-        self.update_display(search_result_data)
-        self.update_status(len(search_result_data))
+        def on_done(search_mask):
+            self._show_search_result(task, base_data, search_mask)
+
+        task = self.tasks.submit(
+            self._translations["task_search"],
+            lambda task: searcher.search(search_term, task.report),
+            on_done,
+            lambda error: self._task_failed(error, self._translations["search_error"], "Search failed:"),
+            background=True)
+        self._search_task = task
+
+    def _show_search_result(self, task, base_data, search_mask):
+        if task is not self._search_task or base_data is not self._get_current_display_data():
+            return
+        self._search_task = None
+        rows = self._filter_rows(base_data, search_mask)
+        self.data_grid.set_data(base_data, rows)
+        self._view_rows = rows
+        self.update_status(len(base_data) if rows is None else len(rows))
+        self._refresh_stats()
 
     def export_by_gender(self, gender):
         if self.processed_data.empty:
@@ -415,12 +796,7 @@ class EmployeeGenderClassifier:
             )
             return
 
-        search_term = self.search_var.get().strip().lower()
-        if search_term:
-            mask = pd.Series(False, index=gender_data.index)
-            for col in gender_data.columns:
-                mask = mask | gender_data[col].astype(str).str.lower().str.contains(search_term, na=False)
-            gender_data = gender_data[mask]
+        gender_data = filter_data(self.processed_data, gender, self.search_var.get(), index=self._index_for(self.processed_data))
 
         if gender_data.empty:
             messagebox.showwarning(
@@ -447,33 +823,70 @@ class EmployeeGenderClassifier:
 
         file_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=self._translations["export_file_types"],
             title=title,
             initialfile=initial_filename)
 
         if not file_path:
             return
 
-        try:
-            if file_path.lower().endswith('.csv'):
-                data_to_export.to_csv(file_path, index=False, encoding='utf-8-sig')
-            else:
-                try:
-                    data_to_export.to_excel(file_path, index=False, engine='openpyxl')
-                except ImportError:
-                    messagebox.showerror(self._translations["export_error"], "Exporting to Excel requires the 'openpyxl' library.\nPlease install it (pip install openpyxl) and try again.")
-                    return
-
-            if os.path.exists(file_path):
-                success_msg = success_message_template.format(len(data_to_export), os.path.basename(file_path))
-                success_title = " ".join(self._translations["export_success"].split(" ")[0:2])
-                messagebox.showinfo(success_title, success_msg)
-                self.status_var.set(success_msg)
-            else:
-                messagebox.showerror(self._translations["export_error"], f"Failed to create file at:\n{file_path}")
+        self._run_task(
+            self._translations["task_export"].format(os.path.basename(file_path)),
+            lambda task: write_table(data_to_export, file_path, progress=task.report),
+            lambda result: self._on_export_done(file_path, len(data_to_export), success_message_template),
+            lambda error: self._on_export_failed(file_path, error))
+
+    def _on_export_done(self, file_path, record_count, success_message_template):
+        if os.path.exists(file_path):
+            success_msg = success_message_template.format(record_count, os.path.basename(file_path))
+            success_title = " ".join(self._translations["export_success"].split(" ")[0:2])
+            messagebox.showinfo(success_title, success_msg)
+            self.status_var.set(success_msg)
+        else:
+            messagebox.showerror(self._translations["export_error"], f"Failed to create file at:\n{file_path}")
+
+    def _on_export_failed(self, file_path, error):
+        if isinstance(error, ImportError):
+            file_format = export_format_for(file_path)
+            label, library = ("Excel", "openpyxl") if file_format == "xlsx" else (file_format.capitalize(), "pyarrow")
+            messagebox.showerror(self._translations["export_error"],
+                                 self._translations["export_missing_library"].format(label, library, library))
+            return
+        self._task_failed(error, self._translations["export_error"], "Failed to export data:")
+
+    def export_split_by_gender(self):
+        if self.processed_data.empty:
+            messagebox.showwarning(self._translations["export_no_data"], self._translations["export_no_data"])
+            return
+
+        data_to_export = filter_data(self.processed_data, search_term=self.search_var.get(),
+                                     index=self._index_for(self.processed_data))
+        if data_to_export.empty:
+            messagebox.showwarning(self._translations["export_no_data"], "No data matching the current search to export.")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=self._translations["export_file_types"],
+            title=self._translations["export_split_title"],
+            initialfile="employees.xlsx")
+
+        if not file_path:
+            return
+
+        outputs = split_outputs(split_path_pattern(file_path))
+        self._run_task(
+            self._translations["task_export"].format(os.path.basename(file_path)),
+            lambda task: export_split(data_to_export, outputs, parallel=True, progress=task.report),
+            lambda counts: self._on_split_export_done(file_path, counts),
+            lambda error: self._on_export_failed(file_path, error))
 
-        except Exception as e:
-            messagebox.showerror(self._translations["export_error"], f"Failed to export data:\n{str(e)}")
+    def _on_split_export_done(self, file_path, counts):
+        success_msg = self._translations["export_split_success"].format(
+            counts["Male"], counts["Female"], counts["Unknown"], counts["All"], os.path.basename(file_path))
+        success_title = " ".join(self._translations["export_success"].split(" ")[0:2])
+        messagebox.showinfo(success_title, success_msg)
+        self.status_var.set(success_msg)
 
     def export_all_with_gender(self):
         base_data = self.processed_data
@@ -481,19 +894,7 @@ class EmployeeGenderClassifier:
             messagebox.showwarning(self._translations["export_no_data"], "No processed data available to export.")
             return
 
-        if self.current_filter != "All":
-            filtered_data = base_data[base_data["Gender"] == self.current_filter]
-        else:
-            filtered_data = base_data.copy()
-
-        search_term = self.search_var.get().strip().lower()
-        if search_term:
-            mask = pd.Series(False, index=filtered_data.index)
-            for col in filtered_data.columns:
-                mask = mask | filtered_data[col].astype(str).str.lower().str.contains(search_term, na=False)
-            data_to_export = filtered_data[mask]
-        else:
-            data_to_export = filtered_data
+        data_to_export = filter_data(base_data, self.current_filter, self.search_var.get(), index=self._index_for(base_data))
 
         if data_to_export.empty:
             messagebox.showwarning(self._translations["export_no_data"], "No data matching the current filter/search to export.")
@@ -507,30 +908,9 @@ class EmployeeGenderClassifier:
         )
 
     def update_display(self, df):
-        self.tree.delete(*self.tree.get_children())
-
-        if df is None or df.empty:
-            self.tree["columns"] = []
-            return
-
-        cols = list(df.columns)
-        self.tree["columns"] = cols
-        for col in cols:
-            self.tree.heading(col, text=col, anchor="w")
-            col_width = 0
-            try:
-                max_data_len = df[col].astype(str).str.len().max()
-                header_len = len(col)
-                if pd.isna(max_data_len): max_data_len = 0
-                col_width = max(int(max_data_len), header_len) * 7 + 20
-            except Exception:
-                col_width = len(col) * 7 + 20
-
-            self.tree.column(col, width=min(max(col_width, 100), 350), anchor="w", stretch=True)
-
-        for _, row in df.iterrows():
-            values = [str(v) if pd.notna(v) else "" for v in row]
-            self.tree.insert("", "end", values=values)
+        self.data_grid.set_data(df)
+        self._view_rows = None
+        self._refresh_stats()
 
     def update_status(self, current_count):
         if self.processed_data.empty and self.original_data.empty:
@@ -564,17 +944,295 @@ class EmployeeGenderClassifier:
             messagebox.showwarning(self._translations["stats_no_data"], self._translations["stats_no_data"])
             return
 
-        stats = self.processed_data["Gender"].value_counts()
-        total = len(self.processed_data)
+        if self._current_stats() is not None:
+            self._show_stats_window()
+            return
 
-        message_lines = []
-        for gender in ["Male", "Female", "Unknown"]:
-            count = stats.get(gender, 0)
-            percentage = (count / total) * 100 if total > 0 else 0
-            message_lines.append(self._translations["stats_line"].format(gender, count, percentage))
+        processed_data = self.processed_data
+        self._run_task(
+            self._translations["task_stats"],
+            lambda task: GroupStats(processed_data, progress=task.report),
+            self._on_stats_done,
+            lambda error: self._task_failed(error, self._translations["stats_title"], "Failed to compute statistics:"))
+
+    def _on_stats_done(self, group_stats):
+        if group_stats.source is not self.processed_data:
+            return
+        self.group_stats = group_stats
+        self._show_stats_window()
 
-        message = self._translations["stats_message"].format("\n".join(message_lines), total)
-        messagebox.showinfo(self._translations["stats_title"], message)
+    def _current_stats(self):
+        if self.group_stats is not None and self.group_stats.source is self.processed_data:
+            return self.group_stats
+        return None
+
+    def _show_stats_window(self):
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            self._refresh_stats()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(self._translations["stats_title"])
+        window.geometry("720x480")
+        window.configure(background=self.bg_color)
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(2, weight=1)
+        window.protocol("WM_DELETE_WINDOW", self._close_stats)
+        self.stats_window = window
+
+        option_frame = ttk.Frame(window, padding="10 10 10 0")
+        option_frame.grid(row=0, column=0, sticky="ew")
+        ttk.Label(option_frame, text=self._translations["stats_group_by"]).pack(side="left")
+        self.stats_group_var = tk.StringVar()
+        self.stats_group_box = ttk.Combobox(option_frame, textvariable=self.stats_group_var, state="readonly", width=30)
+        self.stats_group_box.bind("<<ComboboxSelected>>", lambda event: self._refresh_stats())
+        self.stats_group_box.pack(side="left", padx=5)
+        self.stats_view_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(option_frame, text=self._translations["stats_current_view"], variable=self.stats_view_var,
+                        command=self._refresh_stats).pack(side="left", padx=10)
+
+        self.stats_summary_var = tk.StringVar()
+        ttk.Label(window, textvariable=self.stats_summary_var, padding="10 5 10 0").grid(row=1, column=0, sticky="w")
+
+        self.stats_tree = ttk.Treeview(window, show="headings")
+        self.stats_tree.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
+        self.stats_table = None
+        self.stats_sort = None
+
+        button_frame = ttk.Frame(window, padding="10 0 10 10")
+        button_frame.grid(row=3, column=0, sticky="ew")
+        ttk.Button(button_frame, text=self._translations["stats_export"], command=self._export_stats).pack(side="right")
+        self._refresh_stats()
+
+    def _close_stats(self):
+        self.stats_window.destroy()
+        self.stats_window = None
+
+    def _stats_rows(self):
+        if self.stats_view_var.get() and self.data_grid.df is self.processed_data:
+            return self._view_rows
+        return None
+
+    def _refresh_stats(self):
+        if self.stats_window is None:
+            return
+
+        group_stats = self._current_stats()
+        tree = self.stats_tree
+        tree.delete(*tree.get_children())
+        if group_stats is None:
+            self.stats_group_box.config(values=[])
+            self.stats_summary_var.set(self._translations["stats_no_data"])
+            return
+
+        columns = {str(col): col for col in group_stats.columns}
+        self.stats_group_box.config(values=list(columns))
+        if self.stats_group_var.get() not in columns:
+            self.stats_group_var.set(next(iter(columns), ""))
+
+        rows = self._stats_rows()
+        totals = group_stats.view_totals(rows)
+        total = int(totals.sum())
+        lines = [self._translations["stats_line"].format(gender, int(count), count * 100 / total if total else 0)
+                 for gender, count in zip(GENDERS, totals)]
+        self.stats_summary_var.set("    ".join(lines + [self._translations["stats_total"].format(total)]))
+
+        if not columns:
+            tree["columns"] = ["group"]
+            tree.heading("group", text=self._translations["stats_no_groups"], anchor="w")
+            self.stats_table = None
+            return
+
+        table = group_stats.crosstab(columns[self.stats_group_var.get()], rows)
+        if self.stats_sort is not None and self.stats_sort[0] in table.columns:
+            table = table.sort_values(self.stats_sort[0], ascending=self.stats_sort[1], kind="stable")
+        self.stats_table = table
+        tree["columns"] = list(range(len(table.columns)))
+        for i, col in enumerate(table.columns):
+            anchor = "w" if i == 0 else "e"
+            tree.heading(i, text=col, anchor=anchor, command=lambda col=col: self._sort_stats(col))
+            tree.column(i, width=200 if i == 0 else 80, anchor=anchor)
+        for values in table.itertuples(index=False, name=None):
+            tree.insert("", "end", values=[values[0]] + [f"{value:,}" if isinstance(value, (int, np.integer)) else value
+                                                         for value in values[1:]])
+
+    def _sort_stats(self, column):
+        ascending = self.stats_table is not None and column == self.stats_table.columns[0]
+        if self.stats_sort is not None and self.stats_sort[0] == column:
+            ascending = not self.stats_sort[1]
+        self.stats_sort = (column, ascending)
+        self._refresh_stats()
+
+    def _export_stats(self):
+        group_stats = self._current_stats()
+        if group_stats is None:
+            return
+        self._export_data(
+            data_to_export=group_stats.report(rows=self._stats_rows()),
+            title=self._translations["stats_export_title"],
+            initial_filename="gender_breakdown.xlsx",
+            success_message_template=self._translations["stats_export_success"]
+        )
+
+    def save_session(self):
+        data = self._get_current_display_data()
+        if data.empty:
+            messagebox.showwarning(self._translations["export_no_data"], "No data loaded or processed to save.")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=SESSION_EXTENSION,
+            filetypes=self._translations["session_file_types"],
+            title=self._translations["session_save_title"],
+            initialfile="employees" + SESSION_EXTENSION)
+
+        if not file_path:
+            return
+
+        processed = not self.processed_data.empty
+        state = {"filter": self.current_filter, "search": self.search_var.get()}
+        index = self._index_for(data)
+        name_column = self.name_column
+        self._run_task(
+            self._translations["task_session_save"].format(os.path.basename(file_path)),
+            lambda task: save_session(file_path, data, processed, name_column, state, index),
+            lambda result: self.status_var.set(self._translations["session_saved"].format(len(data), os.path.basename(file_path))),
+            self._on_session_failed)
+
+    def open_session(self):
+        file_path = filedialog.askopenfilename(
+            title=self._translations["session_open_title"],
+            filetypes=self._translations["session_file_types"])
+
+        if not file_path:
+            return
+
+        self._run_task(
+            self._translations["task_session_open"].format(os.path.basename(file_path)),
+            lambda task: load_session(file_path),
+            lambda session: self._on_session_loaded(file_path, session),
+            self._on_session_failed)
+
+    def _on_session_loaded(self, file_path, session):
+        data = session["data"]
+        if session["processed"]:
+            self.processed_data = data
+            self.original_data = data[session["original_columns"]]
+        else:
+            self.processed_data = pd.DataFrame()
+            self.original_data = data
+        self.name_column = session["name_column"]
+        self._drop_index()
+        if session["index"] is not None:
+            self._set_index(session["index"])
+        self._gender_masks = None
+        self.current_filter = session["state"].get("filter", "All") if session["processed"] else "All"
+        self.filter_var.set(self.current_filter)
+        self._reset_search()
+        self._update_widget_states()
+        self.update_display(data)
+
+        search_term = session["state"].get("search", "")
+        if search_term or self.current_filter != "All":
+            self.search_var.set(search_term)
+            self.apply_search()
+        if session["index"] is None:
+            self._build_index(data)
+        self.status_var.set(self._translations["session_loaded"].format(
+            len(data), os.path.basename(file_path), memory_usage_mb(data)))
+
+    def _on_session_failed(self, error):
+        if isinstance(error, ImportError):
+            messagebox.showerror(self._translations["session_error"], self._translations["session_missing_library"])
+            return
+        self._task_failed(error, self._translations["session_error"], "Session could not be opened or saved:")
+
+    def show_diagnostics(self):
+        if self.diagnostics_window is not None:
+            self.diagnostics_window.lift()
+            self._refresh_diagnostics()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(self._translations["diagnostics_title"])
+        window.geometry("640x360")
+        window.configure(background=self.bg_color)
+        window.columnconfigure(0, weight=1)
+        window.rowconfigure(0, weight=1)
+        window.protocol("WM_DELETE_WINDOW", self._close_diagnostics)
+        self.diagnostics_window = window
+
+        columns = self._translations["diagnostics_columns"]
+        self.diagnostics_tree = ttk.Treeview(window, columns=columns, show="headings")
+        for i, col in enumerate(columns):
+            anchor = "w" if i == 0 else "e"
+            self.diagnostics_tree.heading(col, text=col, anchor=anchor)
+            self.diagnostics_tree.column(col, width=160 if i == 0 else 80, anchor=anchor)
+        self.diagnostics_tree.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+
+        button_frame = ttk.Frame(window, padding="10 0 10 10")
+        button_frame.grid(row=1, column=0, sticky="ew")
+        self.profile_var = tk.BooleanVar(value=METRICS.profile_dir is not None)
+        ttk.Checkbutton(button_frame, text=self._translations["diagnostics_profile"], variable=self.profile_var,
+                        command=self._toggle_profiling).pack(side="left")
+        ttk.Button(button_frame, text=self._translations["diagnostics_save"], command=self._save_metrics).pack(side="right")
+        ttk.Button(button_frame, text=self._translations["diagnostics_reset"], command=self._reset_metrics).pack(side="right", padx=5)
+        ttk.Button(button_frame, text=self._translations["diagnostics_refresh"], command=self._refresh_diagnostics).pack(side="right")
+        self._refresh_diagnostics()
+
+    def _close_diagnostics(self):
+        self.diagnostics_window.destroy()
+        self.diagnostics_window = None
+
+    def _refresh_diagnostics(self):
+        snapshot = METRICS.snapshot()
+        tree = self.diagnostics_tree
+        tree.delete(*tree.get_children())
+        for name, stage in snapshot["stages"].items():
+            average = stage["seconds"] / stage["calls"] * 1000 if stage["calls"] else 0
+            rate = f"{stage['items'] / stage['seconds']:,.0f}" if stage["items"] and stage["seconds"] else ""
+            tree.insert("", "end", values=(name, stage["calls"], f"{stage['seconds'] * 1000:,.1f}", f"{average:,.1f}",
+                                           f"{stage['items']:,}", rate))
+        for name, value in snapshot["counters"].items():
+            tree.insert("", "end", values=(name, "", "", "", f"{value:,}", ""))
+
+    def _reset_metrics(self):
+        METRICS.reset()
+        self._metrics_mark = {}
+        self.timing_var.set("")
+        self._refresh_diagnostics()
+
+    def _toggle_profiling(self):
+        if not self.profile_var.get():
+            METRICS.profile_dir = None
+            return
+
+        directory = filedialog.askdirectory(title=self._translations["diagnostics_profile_title"],
+                                            parent=self.diagnostics_window)
+        if directory:
+            METRICS.profile_dir = directory
+        else:
+            self.profile_var.set(False)
+
+    def _save_metrics(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            title=self._translations["diagnostics_save_title"],
+            initialfile="metrics.json",
+            parent=self.diagnostics_window)
+
+        if not file_path:
+            return
+
+        try:
+            METRICS.write_json(file_path, records=len(self.processed_data) or len(self.original_data))
+        except OSError as e:
+            messagebox.showerror(self._translations["export_error"], f"Failed to save metrics:\n{str(e)}",
+                                 parent=self.diagnostics_window)
+            return
+        self.status_var.set(self._translations["diagnostics_saved"].format(os.path.basename(file_path)))
 
     def clear_data(self):
         if self.original_data.empty and self.processed_data.empty:
@@ -583,14 +1241,21 @@ class EmployeeGenderClassifier:
         if messagebox.askyesno(self._translations["clear_confirm_title"], self._translations["clear_confirm_msg"]):
             self.original_data = pd.DataFrame()
             self.processed_data = pd.DataFrame()
+            self._drop_index()
+            self.group_stats = None
+            self._gender_masks = None
             self.name_column = None
             self.current_filter = "All"
             self.filter_var.set("All")
-            self.search_var.set("")
+            self._reset_search()
             self.update_display(pd.DataFrame())
             self.status_var.set(self._translations["ready"])
             self._update_widget_states()
 
+    def on_close(self):
+        self.tasks.shutdown()
+        self.root.destroy()
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = EmployeeGenderClassifier(root)
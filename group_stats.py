@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from engine import GENDERS, MATCH_COLUMN, gender_codes
+from metrics import METRICS
+
+MAX_GROUPS = 1000
+MAX_GROUP_RATIO = 0.5
+GROUP_SAMPLE_SIZE = 10000
+BLANK_GROUP = "(blank)"
+ALL_GROUP = "All"
+TOTAL_COLUMN = "Total"
+PERCENT_GENDERS = ["Male", "Female"]
+
+
+class GroupStats:
+    def __init__(self, df, max_groups=MAX_GROUPS, progress=None):
+        with METRICS.stage("stats_build", len(df)):
+            self._build(df, max_groups, progress)
+
+    def _build(self, df, max_groups, progress):
+        self.source = df
+        self.max_groups = max_groups
+        self.codes = self._gender_codes(df["Gender"])
+        self.totals = np.bincount(self.codes, minlength=len(GENDERS))
+        self._groups = {}
+        self._tables = {}
+        self.columns = []
+
+        candidates = [col for col in df.columns if col not in ("Gender", MATCH_COLUMN)]
+        for i, col in enumerate(candidates):
+            if self._group(col, max_groups) is not None:
+                self.columns.append(col)
+            if progress:
+                progress(i + 1, len(candidates))
+
+    @staticmethod
+    def _gender_codes(genders):
+        codes = gender_codes(genders).astype(np.intp)
+        codes[codes < 0] = GENDERS.index("Unknown")
+        return codes
+
+    def _group(self, column, max_groups=None):
+        if column not in self._groups:
+            if max_groups is not None and self.source[column].iloc[:GROUP_SAMPLE_SIZE].nunique() > max_groups:
+                return None
+            codes, labels = pd.factorize(self.source[column], sort=True)
+            if max_groups is not None and (len(labels) > max_groups or len(labels) >= len(codes) * MAX_GROUP_RATIO):
+                return None
+            labels = [str(label) for label in labels] + [BLANK_GROUP]
+            codes = np.where(codes < 0, len(labels) - 1, codes).astype(np.intp)
+            self._groups[column] = (codes, labels)
+            self._tables[column] = self._count(codes, self.codes, len(labels))
+        return self._groups[column]
+
+    @staticmethod
+    def _count(group_codes, genders, group_count):
+        return np.bincount(group_codes * len(GENDERS) + genders,
+                           minlength=group_count * len(GENDERS)).reshape(group_count, len(GENDERS))
+
+    def update(self, df):
+        with METRICS.stage("stats_update", len(df)):
+            codes = self._gender_codes(df["Gender"])
+            changed = np.flatnonzero(codes != self.codes)
+            old, new = self.codes[changed], codes[changed]
+            self.totals += np.bincount(new, minlength=len(GENDERS)) - np.bincount(old, minlength=len(GENDERS))
+            for column, (group_codes, labels) in self._groups.items():
+                groups = group_codes[changed]
+                self._tables[column] += (self._count(groups, new, len(labels)) - self._count(groups, old, len(labels)))
+            self.source = df
+            self.codes = codes
+        return len(changed)
+
+    def counts(self, column, rows=None):
+        group_codes, labels = self._group(column)
+        if rows is None:
+            return self._tables[column], labels
+        with METRICS.stage("stats_view", len(rows)):
+            return self._count(group_codes[rows], self.codes[rows], len(labels)), labels
+
+    def view_totals(self, rows=None):
+        if rows is None:
+            return self.totals
+        return np.bincount(self.codes[rows], minlength=len(GENDERS))
+
+    @staticmethod
+    def _table(counts, labels, name):
+        table = pd.DataFrame(counts, columns=GENDERS)
+        table.insert(0, name, labels)
+        table[TOTAL_COLUMN] = counts.sum(axis=1)
+        table = table[table[TOTAL_COLUMN] > 0].reset_index(drop=True)
+        for gender in PERCENT_GENDERS:
+            table[f"{gender} %"] = (table[gender] * 100 / table[TOTAL_COLUMN]).round(1)
+        return table
+
+    def crosstab(self, column, rows=None):
+        counts, labels = self.counts(column, rows)
+        return self._table(counts, labels, str(column))
+
+    def report(self, columns=None, rows=None):
+        frames = [self._table(self.view_totals(rows)[np.newaxis], [ALL_GROUP], "Group").assign(**{"Group By": ALL_GROUP})]
+        for column in self.columns if columns is None else columns:
+            if column not in self.source.columns:
+                raise ValueError(f"Column '{column}' not found")
+            frames.append(self.crosstab(column, rows).rename(columns={str(column): "Group"}).assign(**{"Group By": str(column)}))
+        report = pd.concat(frames, ignore_index=True)
+        return report[["Group By", "Group"] + [col for col in report.columns if col not in ("Group By", "Group")]]
@@ -0,0 +1,63 @@
+import os
+import struct
+import sys
+import numpy as np
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "gender-script", "names.table")
+MAGIC = b"GSNT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIIII40s")
+
+
+class NameTable:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, format_version, count, key_width, column_count, fingerprint = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"'{path}' is not a compiled name table")
+
+        self.fingerprint = fingerprint.decode("ascii")
+        self.key_width = key_width
+        self.keys = np.memmap(path, dtype=f"S{key_width}", mode="r", offset=HEADER.size, shape=(count,))
+        self.codes = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size + count * key_width,
+                               shape=(count, column_count))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup_codes(self, names, column=0):
+        encoded = [name.encode("utf-8") for name in names]
+        result = np.full(len(encoded), -1, dtype=np.int8)
+        if not encoded or not len(self.keys):
+            return result
+
+        queries = np.array([key if len(key) <= self.key_width else b"" for key in encoded], dtype=f"S{self.key_width}")
+        positions = np.searchsorted(self.keys, queries).clip(max=len(self.keys) - 1)
+        found = (self.keys[positions] == queries) & (queries != b"")
+        result[found] = self.codes[positions[found], column]
+        return result
+
+
+def save_name_table(path, names, codes, fingerprint):
+    encoded = np.array([name.encode("utf-8") for name in names])
+    order = np.argsort(encoded, kind="stable")
+    keys = encoded[order]
+    codes = np.ascontiguousarray(np.asarray(codes, dtype=np.uint8)[order])
+    key_width = keys.dtype.itemsize
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(keys), key_width, codes.shape[1], fingerprint.encode("ascii")))
+        f.write(keys.tobytes())
+        f.write(codes.tobytes())
+    os.replace(temp_path, path)
+
+
+if __name__ == "__main__":
+    from engine import build_name_table
+
+    output_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TABLE_PATH
+    table = build_name_table(output_path)
+    print(f"Compiled {len(table)} names into {output_path}")
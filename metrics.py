@@ -0,0 +1,66 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.profile_dir = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self.last = None
+
+    @contextmanager
+    def stage(self, name, items=0):
+        info = {"items": items}
+        started = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(name, time.perf_counter() - started, info["items"])
+
+    def record(self, name, seconds, items=0):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "items": 0, "last_seconds": 0.0})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["items"] += items
+            stage["last_seconds"] = seconds
+            self.last = (name, seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def write_json(self, path, **extra):
+        with open(path, "w") as f:
+            json.dump(dict(self.snapshot(), **extra), f, indent=2)
+
+    def run_profiled(self, name, func, *args):
+        if not self.profile_dir:
+            return func(*args)
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args)
+        finally:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof"))
+
+
+METRICS = Metrics()
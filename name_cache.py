@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "gender-script", "names.sqlite3")
+DEFAULT_MAX_ENTRIES = 1000000
+QUERY_CHUNK_SIZE = 500
+
+
+class NameCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, fingerprint="", max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS names ("
+            "name TEXT NOT NULL, country TEXT NOT NULL, gender TEXT NOT NULL, used INTEGER NOT NULL, "
+            "PRIMARY KEY (name, country)) WITHOUT ROWID")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS names_used ON names (used)")
+        self._invalidate_if_stale(fingerprint)
+        self._conn.commit()
+
+    def _invalidate_if_stale(self, fingerprint):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            self._conn.execute("DELETE FROM names")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (fingerprint,))
+        row = self._conn.execute("SELECT MAX(used) FROM names").fetchone()
+        self._clock = row[0] or 0
+
+    def get_many(self, names, country=""):
+        names = list(names)
+        found = {}
+        with self._lock:
+            for start in range(0, len(names), QUERY_CHUNK_SIZE):
+                chunk = names[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT name, gender FROM names WHERE country = ? AND name IN ({placeholders})",
+                    [country] + chunk).fetchall()
+                found.update(rows)
+            if found:
+                self._clock += 1
+                self._conn.executemany(
+                    "UPDATE names SET used = ? WHERE name = ? AND country = ?",
+                    [(self._clock, name, country) for name in found])
+                self._conn.commit()
+        return found
+
+    def put_many(self, genders, country=""):
+        if not genders:
+            return
+        with self._lock:
+            self._clock += 1
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO names (name, country, gender, used) VALUES (?, ?, ?, ?)",
+                [(name, country, gender, self._clock) for name, gender in genders.items()])
+            self._trim()
+            self._conn.commit()
+
+    def _trim(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM names WHERE (name, country) IN (SELECT name, country FROM names ORDER BY used LIMIT ?)", (excess,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM names")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
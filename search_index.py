@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+from engine import search_mask
+from metrics import METRICS
+
+MAX_SLICED_TOKENS = 2000
+MAX_SCANNED_HITS = 20000
+
+
+def _concat(arrays, dtype):
+    return np.concatenate(arrays).astype(dtype, copy=False) if arrays else np.array([], dtype=dtype)
+
+
+class SearchIndex:
+    def __init__(self, df, progress=None):
+        with METRICS.stage("index_build", len(df)):
+            self._build(df, progress)
+
+    def _build(self, df, progress):
+        self.source = df
+        self.row_count = len(df)
+
+        columns = []
+        for i, col in enumerate(df.columns):
+            columns.append(self._column_texts(df[col]))
+            if progress:
+                progress(i + 1, len(df.columns))
+
+        all_tokens = pd.Series(_concat([column[-1] for column in columns], object), dtype=object)
+        token_codes, vocabulary = pd.factorize(all_tokens, sort=True)
+        text_codes, texts, pair_texts, pair_tokens = self._join_columns(columns, token_codes, self.row_count)
+        postings, offsets = self._postings(text_codes, pair_texts, pair_tokens, len(vocabulary))
+        self._set_arrays(vocabulary, postings, offsets)
+        self._set_texts(text_codes, texts, pair_texts, pair_tokens)
+
+    @classmethod
+    def from_arrays(cls, df, vocabulary, postings, offsets, texts=None):
+        index = cls.__new__(cls)
+        index.source = df
+        index.row_count = len(df)
+        index._set_arrays(vocabulary, postings, offsets)
+        index._set_texts(*(texts or (None, None, None, None)))
+        return index
+
+    def _set_arrays(self, vocabulary, postings, offsets):
+        self.vocabulary = np.asarray(vocabulary, dtype=object)
+        self._vocabulary_series = pd.Series(self.vocabulary, dtype=object)
+        self._vocabulary_text = "\n".join(self.vocabulary) + "\n"
+        self._token_ends = np.cumsum(self._vocabulary_series.str.len().to_numpy(dtype=np.int64) + 1) - 1
+        self.postings = postings
+        self.offsets = offsets
+
+    def _set_texts(self, text_codes, texts, pair_texts, pair_tokens):
+        self.text_codes = text_codes
+        self.texts = texts
+        self.pair_texts = pair_texts
+        self.pair_tokens = pair_tokens
+
+    @staticmethod
+    def _column_texts(column):
+        codes, uniques = pd.factorize(column)
+        texts = pd.Series(uniques, dtype=object).astype(str).str.lower()
+        if (codes == -1).any():
+            missing_text = column[column.isna()].iloc[:1].astype(str).str.lower().iloc[0]
+            if isinstance(missing_text, str):
+                texts = pd.concat([texts, pd.Series([missing_text], dtype=object)], ignore_index=True)
+                codes = np.where(codes == -1, len(texts) - 1, codes)
+
+        split = texts.str.split()
+        token_counts = split.str.len().fillna(0).to_numpy(dtype=np.int64)
+        token_codes, unique_tokens = pd.factorize(split.explode().dropna())
+        return codes, texts.to_numpy(dtype=object), token_counts, token_codes, np.asarray(unique_tokens, dtype=object)
+
+    @staticmethod
+    def _join_columns(columns, token_codes, row_count):
+        text_codes = np.full((len(columns), row_count), -1, dtype=np.int64)
+        pair_texts = []
+        pair_tokens = []
+        text_offset = 0
+        token_offset = 0
+        for i, (codes, texts, token_counts, tokens, unique_tokens) in enumerate(columns):
+            text_codes[i] = np.where(codes >= 0, codes + text_offset, -1)
+            pair_texts.append(np.repeat(np.arange(len(texts)) + text_offset, token_counts))
+            pair_tokens.append(token_codes[tokens + token_offset])
+            text_offset += len(texts)
+            token_offset += len(unique_tokens)
+        texts = _concat([column[1] for column in columns], object)
+        return text_codes, texts, _concat(pair_texts, np.int64), _concat(pair_tokens, np.int64)
+
+    @staticmethod
+    def _postings(text_codes, pair_texts, pair_tokens, token_count):
+        text_counts = np.bincount(pair_texts, minlength=text_codes.max(initial=-1) + 1)
+        starts = np.cumsum(text_counts) - text_counts
+        flat = text_codes.ravel()
+        valid = np.flatnonzero(flat >= 0)
+        codes = flat[valid]
+
+        row_counts = text_counts[codes]
+        pair_rows = np.repeat(valid % max(text_codes.shape[1], 1), row_counts)
+        ends = np.cumsum(row_counts)
+        within = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - row_counts, row_counts)
+        tokens = pair_tokens[np.repeat(starts[codes], row_counts) + within]
+
+        order = np.argsort(tokens, kind="stable")
+        return pair_rows[order], np.searchsorted(tokens[order], np.arange(token_count + 1))
+
+    def extended(self, df, columns, progress=None):
+        if (self.texts is None or len(df) != self.row_count or any(col in self.source.columns for col in columns)
+                or list(df.columns) != list(self.source.columns) + list(columns)):
+            return SearchIndex(df, progress)
+
+        with METRICS.stage("index_extend", len(df)):
+            added = []
+            for i, col in enumerate(columns):
+                added.append(self._column_texts(df[col]))
+                if progress:
+                    progress(i + 1, len(columns))
+            token_codes, tokens = pd.factorize(pd.Series(_concat([column[-1] for column in added], object), dtype=object))
+            text_codes, texts, pair_texts, pair_tokens = self._join_columns(added, token_codes, self.row_count)
+
+            tokens = np.asarray(tokens, dtype=object)
+            positions = np.searchsorted(self.vocabulary, tokens)
+            known = positions < len(self.vocabulary)
+            known[known] = self.vocabulary[positions[known]] == tokens[known]
+            inserted = np.sort(tokens[~known])
+            insert_at = np.searchsorted(self.vocabulary, inserted)
+            old_codes = np.arange(len(self.vocabulary)) + np.searchsorted(insert_at, np.arange(len(self.vocabulary)), side="right")
+            vocabulary = np.insert(self.vocabulary, insert_at, inserted)
+            pair_tokens = np.searchsorted(vocabulary, tokens)[pair_tokens]
+
+            new_postings, new_offsets = self._postings(text_codes, pair_texts, pair_tokens, len(vocabulary))
+            old_counts = np.zeros(len(vocabulary), dtype=np.int64)
+            old_counts[old_codes] = np.diff(self.offsets)
+            new_counts = np.diff(new_offsets)
+            offsets = np.concatenate([[0], np.cumsum(old_counts + new_counts)])
+
+            postings = np.empty(len(self.postings) + len(new_postings), dtype=self.postings.dtype)
+            old_tokens = np.repeat(np.arange(len(self.vocabulary)), np.diff(self.offsets))
+            postings[offsets[old_codes[old_tokens]] + np.arange(len(self.postings)) - self.offsets[old_tokens]] = self.postings
+            new_tokens = np.repeat(np.arange(len(vocabulary)), new_counts)
+            postings[offsets[new_tokens] + old_counts[new_tokens] + np.arange(len(new_postings)) - new_offsets[new_tokens]] = new_postings
+
+            text_offset = len(self.texts)
+            return SearchIndex.from_arrays(df, vocabulary, postings, offsets, (
+                np.vstack([self.text_codes, np.where(text_codes >= 0, text_codes + text_offset, -1)]),
+                np.concatenate([self.texts, texts]),
+                np.concatenate([self.pair_texts, pair_texts + text_offset]),
+                np.concatenate([old_codes[self.pair_tokens], pair_tokens])))
+
+    def _token_rows(self, token_hits):
+        mask = np.zeros(self.row_count, dtype=bool)
+        hit_codes = np.flatnonzero(token_hits)
+        if len(hit_codes) <= MAX_SLICED_TOKENS:
+            for code in hit_codes:
+                mask[self.postings[self.offsets[code]:self.offsets[code + 1]]] = True
+        else:
+            token_mask = np.zeros(len(self.vocabulary), dtype=bool)
+            token_mask[hit_codes] = True
+            pair_tokens = np.repeat(np.arange(len(self.vocabulary)), np.diff(self.offsets))
+            mask[self.postings[token_mask[pair_tokens]]] = True
+        return mask
+
+    def prefix_hits(self, prefix):
+        start, stop = np.searchsorted(self.vocabulary, [prefix, prefix + "\U0010ffff"])
+        hits = np.zeros(len(self.vocabulary), dtype=bool)
+        hits[start:stop] = True
+        return hits
+
+    def substring_hits(self, term):
+        text = self._vocabulary_text
+        ends = []
+        pos = text.find(term)
+        while pos != -1:
+            if len(ends) == MAX_SCANNED_HITS:
+                return self._vocabulary_series.str.contains(term, regex=False).to_numpy(dtype=bool)
+            end = text.find("\n", pos)
+            ends.append(end)
+            pos = text.find(term, end + 1)
+
+        hits = np.zeros(len(self.vocabulary), dtype=bool)
+        hits[np.searchsorted(self._token_ends, ends)] = True
+        return hits
+
+    def _phrase_rows(self, search_term, piece_hits):
+        candidates = np.ones(len(self.texts), dtype=bool)
+        for hits in piece_hits:
+            present = np.zeros(len(self.texts), dtype=bool)
+            present[self.pair_texts[hits[self.pair_tokens]]] = True
+            candidates &= present
+
+        checked = np.flatnonzero(candidates)
+        matched = np.zeros(len(self.texts) + 1, dtype=bool)
+        matched[checked] = pd.Series(self.texts[checked], dtype=object).str.contains(search_term, regex=False).to_numpy(dtype=bool)
+        return matched[self.text_codes].any(axis=0)
+
+    def search(self, search_term, prefix=False, within=None):
+        search_term = search_term.strip().lower()
+        pieces = search_term.split()
+        if not pieces:
+            return np.ones(self.row_count, dtype=bool) if within is None else within.copy()
+
+        first_hits = self.prefix_hits(pieces[0]) if prefix else self.substring_hits(pieces[0])
+        if len(pieces) > 1 and self.texts is not None:
+            mask = self._phrase_rows(search_term, [first_hits] + [self.substring_hits(piece) for piece in pieces[1:]])
+            return mask if within is None else mask & within
+
+        candidates = self._token_rows(first_hits)
+        if within is not None:
+            candidates &= within
+        if len(pieces) == 1:
+            return candidates
+        for piece in pieces[1:]:
+            candidates &= self._token_rows(self.substring_hits(piece))
+
+        positions = np.flatnonzero(candidates)
+        matched = search_mask(self.source.iloc[positions], search_term).to_numpy(dtype=bool)
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[positions[matched]] = True
+        return mask
+
+
+class IncrementalSearch:
+    def __init__(self, df, index=None):
+        self.df = df
+        self.index = index
+        self._last = ("", None)
+
+    def search(self, search_term, progress=None):
+        search_term = search_term.strip().lower()
+        if not search_term:
+            return None
+        last_term, last_mask = self._last
+        if search_term == last_term:
+            return last_mask
+
+        within = last_mask if last_term and last_term in search_term else None
+        with METRICS.stage("search", len(self.df)):
+            if self.index is not None:
+                mask = self.index.search(search_term, within=within)
+            else:
+                positions = np.flatnonzero(within) if within is not None else np.arange(len(self.df))
+                matched = search_mask(self.df.iloc[positions], search_term, progress).to_numpy(dtype=bool)
+                mask = np.zeros(len(self.df), dtype=bool)
+                mask[positions[matched]] = True
+
+        self._last = (search_term, mask)
+        return mask
@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+import pandas as pd
+from engine import create_engine, extract_first_names
+from fuzzy_index import DEFAULT_MAX_DISTANCE
+from lookup_table import DEFAULT_TABLE_PATH
+from metrics import METRICS
+from name_cache import DEFAULT_CACHE_PATH
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_SIZE = 5000
+BATCH_DELAY_MS = 2
+STREAM_CHUNK_SIZE = 5000
+MAX_CACHE_ENTRIES = 500000
+MAX_BODY_BYTES = 256 * 2 ** 20
+READ_BLOCK_SIZE = 2 ** 16
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class GenderService:
+    def __init__(self, engine, batch_size=BATCH_SIZE, batch_delay_ms=BATCH_DELAY_MS, max_cache_entries=MAX_CACHE_ENTRIES):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay_ms / 1000
+        self.max_cache_entries = max_cache_entries
+        self.cache = {}
+        self._pending = []
+        self._pending_names = 0
+        self._wakeup = None
+        self._batcher = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gender-lookup")
+
+    def classify_batch(self, names):
+        with METRICS.stage("service_batch", len(names)):
+            codes, first_names = pd.factorize(extract_first_names(pd.Series(names, dtype=object)))
+            missing = [name for name in first_names if name not in self.cache]
+            METRICS.count("service_cache_hits", len(first_names) - len(missing))
+            METRICS.count("service_cache_misses", len(missing))
+            if missing:
+                if len(self.cache) + len(missing) > self.max_cache_entries:
+                    self.cache.clear()
+                genders, matches = self.engine.lookup_matched(missing)
+                self.cache.update(zip(missing, zip(genders, matches)))
+            results = [self.cache[name] for name in first_names] + [("Unknown", None)]
+            return [results[code] for code in codes]
+
+    async def classify(self, names):
+        if not names:
+            return []
+        if self._batcher is None:
+            self._wakeup = asyncio.Event()
+            self._batcher = asyncio.create_task(self._run_batches())
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((names, future))
+        self._pending_names += len(names)
+        self._wakeup.set()
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            if self._pending_names < self.batch_size:
+                await asyncio.sleep(self.batch_delay)
+            self._wakeup.clear()
+            batch, self._pending, self._pending_names = self._pending, [], 0
+            names = [name for request_names, _ in batch for name in request_names]
+            METRICS.count("service_requests_batched", len(batch))
+            try:
+                genders = await loop.run_in_executor(self._executor, self.classify_batch, names)
+            except Exception:
+                await self._run_separately(batch)
+                continue
+
+            start = 0
+            for request_names, future in batch:
+                if not future.done():
+                    future.set_result(genders[start:start + len(request_names)])
+                start += len(request_names)
+
+    async def _run_separately(self, batch):
+        loop = asyncio.get_running_loop()
+        for request_names, future in batch:
+            try:
+                genders = await loop.run_in_executor(self._executor, self.classify_batch, request_names)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(genders)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Request failed")
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer):
+        try:
+            method, target, http_version = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+        except ValueError:
+            self._send_json(writer, 400, {"error": "Malformed request"}, keep_alive=False)
+            return False
+
+        keep_alive = http_version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        url = urlsplit(target)
+        try:
+            if method == "GET" and url.path == "/health":
+                self._send_json(writer, 200, {"status": "ok", "cached_names": len(self.cache)}, keep_alive)
+            elif method == "GET" and url.path == "/metrics":
+                self._send_json(writer, 200, METRICS.snapshot(), keep_alive)
+            elif method == "GET" and url.path == "/gender":
+                name = parse_qs(url.query).get("name", [""])[0]
+                result = (await self.classify([name]))[0]
+                self._send_json(writer, 200, self._result(name, result), keep_alive)
+            elif method == "POST" and url.path in ("/gender", "/classify"):
+                length = self._content_length(headers)
+                content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if content_type in NDJSON_TYPES:
+                    await self._classify_ndjson(reader, writer, length, keep_alive)
+                else:
+                    await self._classify_json(await reader.readexactly(length), writer, keep_alive)
+            else:
+                raise HTTPError(404, f"No route for {method} {url.path}")
+        except HTTPError as e:
+            self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+            return False
+        return keep_alive
+
+    @staticmethod
+    def _content_length(headers):
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length is required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        return length
+
+    @staticmethod
+    def _name_of(item):
+        return item.get("name") if isinstance(item, dict) else item
+
+    @classmethod
+    def _valid(cls, item):
+        return isinstance(cls._name_of(item), (str, type(None)))
+
+    @staticmethod
+    def _result(item, result):
+        gender, match = result
+        output = dict(item, gender=gender) if isinstance(item, dict) else {"name": item, "gender": gender}
+        if match is not None:
+            output["matched_name"] = match
+        return output
+
+    async def _classify_json(self, body, writer, keep_alive):
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            self._send_json(writer, 400, {"error": f"Invalid JSON: {e}"}, keep_alive)
+            return
+        if isinstance(payload, dict) and "name" in payload:
+            if not self._valid(payload):
+                self._send_json(writer, 400, {"error": "Names must be strings or null"}, keep_alive)
+                return
+            result = (await self.classify([payload["name"]]))[0]
+            self._send_json(writer, 200, self._result(payload, result), keep_alive)
+            return
+        items = payload.get("names") if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            self._send_json(writer, 400, {"error": "Expected a list of names or {\"names\": [...]}"}, keep_alive)
+            return
+        invalid = next((i for i, item in enumerate(items) if not self._valid(item)), None)
+        if invalid is not None:
+            self._send_json(writer, 400, {"error": f"Item {invalid}: names must be strings or null"}, keep_alive)
+            return
+
+        self._start_stream(writer, "application/json", keep_alive)
+        self._write_chunk(writer, b'{"results": [')
+        chunks = [items[start:start + STREAM_CHUNK_SIZE] for start in range(0, len(items), STREAM_CHUNK_SIZE)]
+        pending = asyncio.ensure_future(self.classify([self._name_of(item) for item in chunks[0]])) if chunks else None
+        for i, chunk in enumerate(chunks):
+            results = await pending
+            if i + 1 < len(chunks):
+                pending = asyncio.ensure_future(self.classify([self._name_of(item) for item in chunks[i + 1]]))
+            text = ", ".join(json.dumps(self._result(item, result)) for item, result in zip(chunk, results))
+            self._write_chunk(writer, ((", " if i else "") + text).encode())
+            await writer.drain()
+        self._write_chunk(writer, b"]}")
+        self._end_stream(writer)
+
+    async def _classify_ndjson(self, reader, writer, length, keep_alive):
+        self._start_stream(writer, "application/x-ndjson", keep_alive)
+        remaining = length
+        lines = []
+        partial = b""
+        while remaining > 0 or lines:
+            if remaining > 0:
+                data = await reader.readexactly(min(remaining, READ_BLOCK_SIZE))
+                remaining -= len(data)
+                block = (partial + data).split(b"\n")
+                partial = block.pop() if remaining > 0 else b""
+                lines.extend(line for line in block if line.strip())
+                if remaining > 0 and len(lines) < STREAM_CHUNK_SIZE:
+                    continue
+
+            chunk, lines = lines[:STREAM_CHUNK_SIZE], lines[STREAM_CHUNK_SIZE:]
+            items = []
+            errors = []
+            for line in chunk:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    items.append(None)
+                    errors.append("Invalid JSON line")
+                    continue
+                items.append(item)
+                errors.append(None if self._valid(item) else "Names must be strings or null")
+            results = iter(await self.classify([self._name_of(item) for item, error in zip(items, errors) if error is None]))
+            output = [json.dumps(self._result(item, next(results)) if error is None else
+                                 {"error": error, "line": line.decode("utf-8", "replace").strip()})
+                      for item, error, line in zip(items, errors, chunk)]
+            if output:
+                self._write_chunk(writer, ("\n".join(output) + "\n").encode())
+            if remaining == 0:
+                await writer.drain()
+        self._end_stream(writer)
+
+    @staticmethod
+    def _headers(status, content_type, keep_alive, extra):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 411: "Length Required",
+                  413: "Payload Too Large"}.get(status, "Error")
+        connection = "keep-alive" if keep_alive else "close"
+        return (f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                f"Connection: {connection}\r\n{extra}\r\n").encode("latin-1")
+
+    def _send_json(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write(self._headers(status, "application/json", keep_alive, f"Content-Length: {len(body)}\r\n") + body)
+
+    def _start_stream(self, writer, content_type, keep_alive):
+        writer.write(self._headers(200, content_type, keep_alive, "Transfer-Encoding: chunked\r\n"))
+
+    @staticmethod
+    def _write_chunk(writer, data):
+        if data:
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    @staticmethod
+    def _end_stream(writer):
+        writer.write(b"0\r\n\r\n")
+
+    def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = await asyncio.start_server(service.handle, host, port)
+    logger.warning("Serving gender classification on http://%s:%s", host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve gender classification over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("--country", help="Country hint passed to the name detector (e.g. great_britain, usa)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Name cache file (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache", action="store_const", const=None, help="Disable the name cache")
+    parser.add_argument("--table", default=DEFAULT_TABLE_PATH, help="Compiled name table, used instead of the detector when present (default: %(default)s)")
+    parser.add_argument("--no-table", dest="table", action="store_const", const=None, help="Ignore the compiled name table")
+    parser.add_argument("--fuzzy", type=int, nargs="?", const=DEFAULT_MAX_DISTANCE, default=0, metavar="DISTANCE",
+                        help=f"Match unknown names to the nearest dictionary name within DISTANCE edits (default when given: {DEFAULT_MAX_DISTANCE})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Names per lookup batch (default: %(default)s)")
+    parser.add_argument("--batch-delay-ms", type=float, default=BATCH_DELAY_MS, help="How long to wait for more requests before a lookup (default: %(default)s)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    try:
+        engine = create_engine(args.cache, args.country, args.table, fuzzy_distance=args.fuzzy)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    service = GenderService(engine, args.batch_size, args.batch_delay_ms)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import json
+import os
+import numpy as np
+from engine import MATCH_COLUMN, arrow_compatible
+from search_index import SearchIndex
+from metrics import METRICS
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+SESSION_EXTENSION = ".gsession"
+INDEX_SUFFIX = ".index"
+SESSION_VERSION = 1
+METADATA_KEY = b"gender-script"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Session snapshots require the 'pyarrow' library")
+
+
+def _write_ipc(table, path):
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_ipc(path):
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _index_texts(arrays, row_count):
+    if "texts" not in arrays.column_names:
+        return None
+    text_codes = arrays.column("text_codes").chunk(0).values.to_numpy()
+    texts = arrays.column("texts").chunk(0).values.to_numpy(zero_copy_only=False)
+    if not row_count or len(text_codes) % row_count or text_codes.max(initial=-1) >= len(texts):
+        return None
+    return (text_codes.reshape(-1, row_count), texts,
+            arrays.column("pair_texts").chunk(0).values.to_numpy(),
+            arrays.column("pair_tokens").chunk(0).values.to_numpy())
+
+
+def save_session(path, data, processed=False, name_column=None, state=None, index=None):
+    _require_pyarrow()
+    with METRICS.stage("session_save", len(data)):
+        metadata = {
+            "version": SESSION_VERSION,
+            "processed": processed,
+            "name_column": name_column,
+            "original_columns": [str(col) for col in data.columns if not (processed and col in ("Gender", MATCH_COLUMN))],
+            "state": state or {},
+            "row_count": len(data),
+        }
+        table = pa.Table.from_pandas(arrow_compatible(data).reset_index(drop=True), preserve_index=False)
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[METADATA_KEY] = json.dumps(metadata).encode()
+        table = table.replace_schema_metadata(schema_metadata)
+        _write_ipc(table, path)
+
+        index_path = path + INDEX_SUFFIX
+        if index is not None and index.source is data:
+            arrays = {
+                "vocabulary": pa.array([index.vocabulary], type=pa.list_(pa.large_string())),
+                "postings": pa.array([index.postings], type=pa.list_(pa.int32() if len(data) < 2 ** 31 else pa.int64())),
+                "offsets": pa.array([index.offsets], type=pa.list_(pa.int64())),
+            }
+            if index.texts is not None:
+                arrays["text_codes"] = pa.array([index.text_codes.ravel()], type=pa.large_list(pa.int64()))
+                arrays["texts"] = pa.array([index.texts], type=pa.list_(pa.large_string()))
+                arrays["pair_texts"] = pa.array([index.pair_texts], type=pa.list_(pa.int64()))
+                arrays["pair_tokens"] = pa.array([index.pair_tokens], type=pa.list_(pa.int64()))
+            _write_ipc(pa.table(arrays), index_path)
+        elif os.path.exists(index_path):
+            os.remove(index_path)
+
+
+def load_session(path):
+    _require_pyarrow()
+    with METRICS.stage("session_load") as stage:
+        table = _read_ipc(path)
+        metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b"null"))
+        if not metadata or metadata.get("version") != SESSION_VERSION:
+            raise ValueError(f"'{os.path.basename(path)}' is not a saved session")
+
+        data = table.to_pandas(split_blocks=True)
+        stage["items"] = len(data)
+        index = None
+        index_path = path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            arrays = _read_ipc(index_path)
+            postings = arrays.column("postings").chunk(0).values.to_numpy()
+            offsets = arrays.column("offsets").chunk(0).values.to_numpy()
+            if offsets[-1] == len(postings) and (not len(postings) or postings.max() < len(data)):
+                vocabulary = arrays.column("vocabulary").chunk(0).values.to_numpy(zero_copy_only=False)
+                index = SearchIndex.from_arrays(data, vocabulary, postings, offsets.astype(np.int64, copy=False),
+                                                _index_texts(arrays, len(data)))
+    return {
+        "data": data,
+        "processed": metadata["processed"],
+        "name_column": metadata["name_column"],
+        "original_columns": metadata["original_columns"],
+        "state": metadata["state"],
+        "index": index,
+    }
@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 100
+FIRST_POLL_MS = 10
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, label, background=False):
+        self.label = label
+        self.background = background
+        self.done = 0
+        self.total = 0
+        self.started = time.monotonic()
+        self._cancelled = threading.Event()
+
+    def report(self, done, total):
+        self.done = done
+        self.total = total
+        if self._cancelled.is_set():
+            raise TaskCancelled()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else None
+
+    def eta(self):
+        fraction = self.fraction
+        if not fraction:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed * (1 - fraction) / fraction
+
+
+class TaskRunner:
+    def __init__(self, root, on_progress, on_idle, max_workers=1):
+        self.root = root
+        self.on_progress = on_progress
+        self.on_idle = on_idle
+        self.active = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gender-task")
+
+    @property
+    def busy(self):
+        return any(not task.background for task in self.active)
+
+    def submit(self, label, func, on_done, on_error, background=False):
+        task = Task(label, background)
+        future = self._executor.submit(func, task)
+        self.active.append(task)
+        self.root.after(FIRST_POLL_MS, self._poll, task, future, on_done, on_error)
+        return task
+
+    def cancel(self):
+        for task in self.active:
+            task.cancel()
+
+    def _poll(self, task, future, on_done, on_error):
+        if not future.done():
+            self.on_progress(task)
+            self.root.after(POLL_INTERVAL_MS, self._poll, task, future, on_done, on_error)
+            return
+
+        self.active.remove(task)
+        if not self.active:
+            self.on_idle()
+        else:
+            self.on_progress(self.active[-1])
+
+        try:
+            result = future.result()
+        except Exception as e:
+            on_error(e)
+            return
+        if task.cancelled:
+            on_error(TaskCancelled())
+        else:
+            on_done(result)
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pandas as pd
+import engine
+from engine import (GenderEngine, batch_root, batch_source, delta_report, delta_summary, expand_inputs,
+                    extract_first_names, find_key_column, read_table, shared_key, write_table)
+
+
+def roster(ids, names, genders):
+    return pd.DataFrame({"ID": ids, "Name": names, "Gender": pd.Categorical(genders, categories=["Male", "Female", "Unknown"])})
+
+
+def test_delta_report_ignores_duplicate_keys():
+    data = roster([1, 1, 2], ["Anna", "John", "Mary"], ["Female", "Male", "Female"])
+    report = delta_report(data, data.copy(), "Name", key="ID")
+    assert report.empty
+    assert report.attrs["key"] is None
+
+
+def test_delta_report_ignores_blank_keys():
+    rows = 20000
+    data = roster([np.nan] * rows, ["Anna"] * rows, ["Female"] * rows)
+    changed = data.copy()
+    changed.loc[0, "Name"] = "John"
+    changed["Gender"] = changed["Gender"].where(changed["Name"] == "Anna", "Male")
+    report = delta_report(data, changed, "Name", key="ID")
+    assert delta_summary(report) == {"added": 1, "removed": 1, "renamed": 0, "gender_changed": 0}
+
+
+def test_delta_report_uses_unique_key():
+    previous = roster([1, 2], ["Anna", "John"], ["Female", "Male"])
+    processed = roster([1, 2], ["Anne", "John"], ["Female", "Male"])
+    report = delta_report(previous, processed, "Name", key="ID")
+    assert report["Change"].tolist() == ["renamed"]
+    assert report["ID"].tolist() == [1]
+    assert report.attrs["key"] == "ID"
+
+
+def test_bare_id_is_not_a_key():
+    assert find_key_column(["ID", "Name"]) is None
+    assert find_key_column(["Employee ID", "Name"]) == "Employee ID"
+
+
+def test_shared_key_follows_column_order():
+    previous = pd.DataFrame(columns=["Staff ID", "employee id", "Employee ID", "Name"])
+    processed = pd.DataFrame(columns=["Employee ID", "Staff ID", "employee id", "Name", "Gender"])
+    assert shared_key(previous, processed) == "Employee ID"
+    assert shared_key(previous[["Staff ID", "Name"]], processed) == "Staff ID"
+
+
+def test_xlsx_round_trip(tmp_path):
+    data = roster([1, 2, 3], ["Anna", None, "John"], ["Female", "Unknown", "Male"])
+    path = str(tmp_path / "roster.xlsx")
+    write_table(data, path)
+    result = read_table(path)
+    assert result.columns.tolist() == ["ID", "Name", "Gender"]
+    assert result["ID"].tolist() == [1, 2, 3]
+    assert result["Name"].iloc[[0, 2]].tolist() == ["Anna", "John"]
+    assert pd.isna(result["Name"].iloc[1])
+    assert result["Gender"].tolist() == ["Female", "Unknown", "Male"]
+
+
+def test_first_name_formats():
+    names = pd.Series(["Smith, John", "MR JOHN SMITH", "Dr. med. Anna Weber", "J. Robert Oppenheimer", "ELODIE MARTIN"])
+    assert extract_first_names(names).tolist() == ["John", "John", "Anna", "Robert", "Elodie"]
+
+
+def test_accented_names_fall_back_to_plain_spelling():
+    engine = GenderEngine()
+    names = pd.Series(["Élodie Martin", "ELODIE MARTIN", "Élodie-Anne Roy"])
+    assert engine.classify_names(names).tolist() == ["Female", "Female", "Female"]
+
+
+def test_expand_inputs_recurses_into_folders(tmp_path):
+    for folder in ["east", "west/north"]:
+        (tmp_path / folder).mkdir(parents=True)
+        (tmp_path / folder / "staff.csv").write_text("Name\nAnna\n")
+    (tmp_path / "west" / "~$staff.xlsx").write_text("")
+    files = expand_inputs([str(tmp_path)])
+    assert [os.path.relpath(path, tmp_path) for path in files] == [os.path.join("east", "staff.csv"),
+                                                                   os.path.join("west", "north", "staff.csv")]
+
+
+def test_batch_source_without_common_folder(monkeypatch):
+    def different_drives(paths):
+        raise ValueError("Paths don't have the same drive")
+
+    monkeypatch.setattr(engine.os.path, "commonpath", different_drives)
+    root = batch_root(["C:/data/east.csv", "D:/data/west.csv"])
+    assert root is None
+    assert batch_source("D:/data/west.csv", root) == "west.csv"
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from engine import search_mask
+from search_index import IncrementalSearch, SearchIndex
+
+TERMS = ["anna", "ann", "nan", "3", "1.5", "sales", "sales east", "anna smith", "a s", "smith,", "female", "zzz"]
+
+
+def roster():
+    return pd.DataFrame({
+        "Name": ["Anna Smith", "John Doe", None, "anna  smith", "Mary-Ann Lee", "Zoë Ball"],
+        "Dept": pd.Categorical(["Sales East", "HR", "Sales West", None, "Sales East", "HR"]),
+        "Code": pd.Series([3, "A3", 1.5, None, "x", 33], dtype=object),
+        "Salary": [100, 200, 300, 400, 500, 600],
+        "Score": [1.5, np.nan, 3.0, 0.5, 2.25, 3.5],
+    })
+
+
+def expected(df, term):
+    return search_mask(df, term.strip().lower()).to_numpy()
+
+
+def test_search_matches_scan():
+    data = roster()
+    index = SearchIndex(data)
+    for term in TERMS:
+        assert (index.search(term) == expected(data, term)).all(), term
+
+
+def test_search_without_texts_matches_scan():
+    data = roster()
+    full = SearchIndex(data)
+    index = SearchIndex.from_arrays(data, full.vocabulary, full.postings, full.offsets)
+    for term in TERMS:
+        assert (index.search(term) == expected(data, term)).all(), term
+
+
+def test_search_within():
+    data = roster()
+    index = SearchIndex(data)
+    within = np.array([True, False, True, True, False, True])
+    for term in TERMS:
+        assert (index.search(term, within=within) == (expected(data, term) & within)).all(), term
+
+
+def test_extended_matches_rebuild():
+    data = roster()
+    processed = data.copy(deep=False)
+    processed["Gender"] = pd.Categorical(["Female", "Male", "Unknown", "Female", "Female", "Female"],
+                                         categories=["Male", "Female", "Unknown"])
+    processed["Matched Name"] = [None, None, None, None, "Mary", "Zoe"]
+    extended = SearchIndex(data).extended(processed, ["Gender", "Matched Name"])
+    rebuilt = SearchIndex(processed)
+    assert (extended.vocabulary == rebuilt.vocabulary).all()
+    assert (extended.offsets == rebuilt.offsets).all()
+    assert (extended.postings == rebuilt.postings).all()
+    for term in TERMS + ["male", "mary", "zoe", "unknown"]:
+        assert (extended.search(term) == expected(processed, term)).all(), term
+
+
+def test_extended_rebuilds_replaced_columns():
+    data = roster().assign(Gender="Unknown")
+    processed = data.assign(Gender="Female")
+    extended = SearchIndex(data).extended(processed, ["Gender"])
+    assert (extended.search("female") == expected(processed, "female")).all()
+
+
+def test_incremental_search_matches_scan():
+    data = roster()
+    for index in (None, SearchIndex(data)):
+        searcher = IncrementalSearch(data, index)
+        for term in ["s", "sa", "sales", "sales e", "sales east", "sales", "sal", "a", "an", "ann", "anna smith", "an"]:
+            assert (searcher.search(term) == expected(data, term)).all(), term
+
+
+def test_incremental_search_keeps_term_and_mask_together():
+    data = roster()
+    searcher = IncrementalSearch(data, SearchIndex(data))
+    searcher.search("sales east")
+    term, mask = searcher._last
+    assert term == "sales east"
+    assert (mask == expected(data, "sales east")).all()
+    assert (searcher.search("sales") == expected(data, "sales")).all()
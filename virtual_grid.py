@@ -0,0 +1,159 @@
+from tkinter import ttk
+import pandas as pd
+from metrics import METRICS
+
+DEFAULT_ROW_HEIGHT = 22
+BUFFER_ROWS = 50
+WIDTH_SAMPLE_SIZE = 500
+
+
+def format_rows(frame):
+    return [[str(v) if pd.notna(v) else "" for v in row] for row in frame.itertuples(index=False, name=None)]
+
+
+def column_widths(sample):
+    widths = {}
+    for col in sample.columns:
+        header = str(col)
+        try:
+            max_data_len = sample[col].astype(str).str.len().max()
+            if pd.isna(max_data_len): max_data_len = 0
+            col_width = max(int(max_data_len), len(header)) * 7 + 20
+        except Exception:
+            col_width = len(header) * 7 + 20
+        widths[col] = min(max(col_width, 100), 350)
+    return widths
+
+
+class VirtualGrid:
+    def __init__(self, parent, buffer_rows=BUFFER_ROWS, sample_size=WIDTH_SAMPLE_SIZE):
+        self.buffer_rows = buffer_rows
+        self.sample_size = sample_size
+        self.df = None
+        self.rows = None
+        self.offset = 0
+        self.visible_rows = 20
+        self._block_start = 0
+        self._block_rows = []
+
+        self.tree = ttk.Treeview(parent, show="headings", selectmode="extended", height=self.visible_rows)
+        self.vsb = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.hsb = ttk.Scrollbar(parent, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self._step(-1))
+        self.tree.bind("<Down>", lambda event: self._step(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.visible_rows))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0))
+        self.tree.bind("<End>", lambda event: self.scroll_to(self.row_count))
+
+    def grid(self, row, column):
+        self.tree.grid(row=row, column=column, sticky='nsew')
+        self.vsb.grid(row=row, column=column + 1, sticky='ns')
+        self.hsb.grid(row=row + 1, column=column, sticky='ew')
+
+    @property
+    def row_count(self):
+        if self.df is None:
+            return 0
+        return len(self.df) if self.rows is None else len(self.rows)
+
+    def set_data(self, df, rows=None):
+        self.df = df if df is not None and not df.empty else None
+        self.rows = rows
+        self.offset = 0
+        self._block_start = 0
+        self._block_rows = []
+
+        if self.row_count == 0:
+            self.tree.delete(*self.tree.get_children())
+            self.tree["columns"] = []
+            self.vsb.set(0, 1)
+            return
+
+        cols = list(self.df.columns)
+        self.tree["columns"] = cols
+        for col, width in column_widths(self._frame(0, self.sample_size)).items():
+            self.tree.heading(col, text=str(col), anchor="w")
+            self.tree.column(col, width=width, anchor="w", stretch=True)
+
+        self._render()
+
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def scroll_to(self, offset):
+        max_offset = max(self.row_count - self.visible_rows, 0)
+        offset = min(max(int(offset), 0), max_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        return "break"
+
+    def _on_wheel(self, event):
+        if event.delta == 0:
+            return "break"
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _step(self, rows):
+        items = self.tree.get_children()
+        if not items or self.tree.focus() != items[0 if rows < 0 else -1]:
+            return None
+        return self.scroll(rows)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        visible_rows = max((event.height - row_height - 8) // row_height, 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.offset = min(self.offset, max(self.row_count - visible_rows, 0))
+            self._render()
+
+    def _frame(self, start, stop):
+        if self.rows is None:
+            return self.df.iloc[start:stop]
+        return self.df.iloc[self.rows[start:stop]]
+
+    def _rows(self, start, stop):
+        block_stop = self._block_start + len(self._block_rows)
+        if start < self._block_start or stop > block_stop:
+            self._block_start = max(start - self.buffer_rows, 0)
+            self._block_rows = format_rows(self._frame(self._block_start, stop + self.buffer_rows))
+        return self._block_rows[start - self._block_start:stop - self._block_start]
+
+    def _render(self):
+        if self.row_count == 0:
+            return
+
+        with METRICS.stage("render", min(self.visible_rows, self.row_count - self.offset)):
+            self._render_rows()
+
+    def _render_rows(self):
+        rows = self._rows(self.offset, min(self.offset + self.visible_rows, self.row_count))
+        items = self.tree.get_children()
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+            items = items[:len(rows)]
+
+        for i, values in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+
+        self.tree.yview_moveto(0)
+        total = self.row_count
+        self.vsb.set(self.offset / total, min(self.offset + len(rows), total) / total)